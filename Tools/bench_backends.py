@@ -0,0 +1,81 @@
+"""
+Benchmark: simulation steps per second for each backend of backend.py.
+
+Each backend runs in its own process (the backend is chosen when backend.py is
+imported) on the activitygen demand in config["route-mista"], with a
+controller that reads the speed and road of every active vehicle per step,
+which is the kind of call volume the control loops make.
+
+Run from the repository root:
+    python Tools/bench_backends.py --steps 2000
+    python Tools/bench_backends.py --backends sumo libsumo sumo-gui
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+with open(r'config/config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+
+def worker(steps):
+    sys.path.insert(0, str(ROOT))
+    from backend import traci, start
+
+    route_file = config["route-mista"] if os.path.exists(config["route-mista"]) else config["route-files"]
+    start([
+        '--net-file', config["net-file"],
+        '--route-files', route_file,
+        '--additional-files', config["additional-files"],
+        '--step-length', config["step"],
+        '--no-step-log', 'true',
+        '--no-warnings', 'true',
+        '--start',
+        '--quit-on-end',
+    ])
+
+    calls = 0
+    begin = time.perf_counter()
+    for _ in range(steps):
+        for veh_id in traci.vehicle.getIDList():
+            traci.vehicle.getSpeed(veh_id)
+            traci.vehicle.getRoadID(veh_id)
+            calls += 2
+        traci.simulationStep()
+    elapsed = time.perf_counter() - begin
+    traci.close()
+    print(json.dumps({"steps": steps, "calls": calls, "elapsed": elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--backends", nargs="+", default=["sumo", "libsumo"])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.steps)
+        return
+
+    print(f"{'backend':<10}{'steps/s':>10}{'calls/step':>12}{'wall time (s)':>16}")
+    for name in args.backends:
+        env = dict(os.environ, SUMO_BACKEND=name)
+        out = subprocess.run([sys.executable, __file__, "--worker", "--steps", str(args.steps)],
+                             env=env, cwd=ROOT, capture_output=True, text=True)
+        if out.returncode != 0:
+            print(f"{name:<10}{'failed':>10}  {out.stderr.strip().splitlines()[-1:]}")
+            continue
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{name:<10}{result['steps'] / result['elapsed']:>10.1f}"
+              f"{result['calls'] / result['steps']:>12.1f}{result['elapsed']:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: per-step ID lookups of fifthtraffic.simulation() vs StepSnapshot.
+
+Loads the activitygen demand (config["route-mista"]) and lets SUMO run natively
+up to --begin (the morning peak by default), so thousands of vehicles are active
+or waiting for insertion, and tracks --tracked of them. The legacy
+pattern asks traci.vehicle.getIDList() once per tracked vehicle in the
+register loop and again in the battery loop, and scans the returned tuple.
+The snapshot fetches the ID lists once per step and answers from sets.
+
+Run from the repository root:
+    python Tools/bench_step_snapshot.py --begin 25200 --tracked 100 --steps 200
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend import traci, start
+from snapshot import StepSnapshot
+
+with open(r'config/config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+
+def legacy_step(tracked):
+    hits = 0
+    for veh_id in tracked:                                                      # register loop
+        if veh_id in traci.vehicle.getIDList():
+            hits += 1
+    traci.simulationStep()
+    for veh_id in tracked:                                                      # battery loop
+        if veh_id in traci.vehicle.getIDList():
+            hits += 1
+    traci.simulation.getLoadedIDList()
+    traci.simulation.getTime()
+    return hits
+
+
+def snapshot_step(tracked, snapshot):
+    hits = 0
+    for veh_id in tracked:
+        if veh_id in snapshot.active:
+            hits += 1
+    traci.simulationStep()
+    snapshot.refresh()
+    for veh_id in tracked:
+        if veh_id in snapshot.active:
+            hits += 1
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--begin", type=int, default=25200)
+    parser.add_argument("--tracked", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    start([
+        '--net-file', config["net-file"],
+        '--route-files', config["route-mista"],
+        '--additional-files', config["additional-files"],
+        '--step-length', config["step"],
+        '--no-step-log', 'true',
+        '--no-warnings', 'true',
+    ])
+    traci.simulationStep(float(args.begin))
+
+    active = traci.vehicle.getIDList()
+    tracked = list(active[-args.tracked:])
+    print(f"active vehicles: {len(active)}, waiting for insertion: {len(traci.simulation.getPendingVehicles())}, "
+          f"tracked: {len(tracked)}")
+
+    begin = time.perf_counter()
+    for _ in range(args.steps):
+        legacy_step(tracked)
+    legacy = (time.perf_counter() - begin) / args.steps
+
+    snapshot = StepSnapshot().refresh()
+    begin = time.perf_counter()
+    for _ in range(args.steps):
+        snapshot_step(tracked, snapshot)
+    snap = (time.perf_counter() - begin) / args.steps
+    print(f"active vehicles at the end: {len(snapshot.ids)}")
+    traci.close()
+
+    print(f"{'mode':<10}{'ms/step':>10}")
+    print(f"{'legacy':<10}{legacy * 1000:>10.2f}")
+    print(f"{'snapshot':<10}{snap * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
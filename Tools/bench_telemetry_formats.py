@@ -0,0 +1,116 @@
+"""
+Benchmark: disk use and load time of the csv, npz and sqlite telemetry formats.
+
+Writes --steps rows for each of --vehicles vehicles with each sink into a
+temporary results folder, then loads everything back: the CSVs with pandas
+(or the csv module when pandas is not installed), the npz parts with
+telemetry.load_columns and the sqlite table with telemetry.query. The last
+column is the time to read a single vehicle back. Rows are synthetic, drawn from a few hundred edges
+like a run on config/netb.net.xml.
+
+Run from the repository root:
+    python Tools/bench_telemetry_formats.py --vehicles 1000 --steps 500
+"""
+import argparse
+import csv
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from telemetry import CSV_HEADER, NPZ_FOLDER, SQLITE_FILE, load_columns, open_sink, query
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+def write_run(fmt, folder, vehicles, steps, batch_rows):
+    rng = random.Random(1)
+    edges = [f"E{number}" for number in range(300)] + [f"-E{number}" for number in range(300)]
+    if fmt == "csv":                                                            # as setup_results_and_headers()
+        for number in range(vehicles):
+            with open(folder / f"veh_{number}.csv", mode="w", newline="", encoding="utf-8") as file:
+                csv.writer(file).writerow(CSV_HEADER)
+    sink = open_sink(fmt, folder, batch_rows, 60.0)
+    for step in range(steps):
+        for number in range(vehicles):
+            sink.write(f"veh_{number}", (f"veh_{number}", rng.uniform(0, 60), rng.choice(edges), step * 4.2 + number,
+                                         rng.choice(edges), rng.uniform(0, 3000), "evehicle",
+                                         100 - step * 0.05, step * 0.5))
+    sink.close()
+
+
+def load_csv(folder):
+    if pd is not None:
+        return sum(len(pd.read_csv(path)) for path in folder.glob("veh_*.csv"))
+    rows = 0
+    for path in folder.glob("veh_*.csv"):
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            next(reader)
+            rows += sum(1 for _ in reader)
+    return rows
+
+
+def load_npz(folder):
+    return len(load_columns(folder / NPZ_FOLDER)["timestamp"])
+
+
+def load_sqlite(folder):
+    return len(query(folder / SQLITE_FILE)["timestamp"])
+
+
+def load_one_csv(folder):
+    if pd is not None:
+        return len(pd.read_csv(folder / "veh_7.csv"))
+    with open(folder / "veh_7.csv", newline="", encoding="utf-8") as file:
+        return sum(1 for _ in file) - 1
+
+
+def load_one_npz(folder):
+    columns = load_columns(folder / NPZ_FOLDER)
+    return int((columns["veh_id"] == "veh_7").sum())
+
+
+def load_one_sqlite(folder):
+    return len(query(folder / SQLITE_FILE, "veh_7")["timestamp"])
+
+
+def disk_use(folder):
+    return sum(path.stat().st_size for path in folder.rglob("*") if path.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--batch-rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{args.vehicles} vehicles x {args.steps} steps = {args.vehicles * args.steps} rows, "
+          f"csv loaded with {'pandas' if pd is not None else 'the csv module'}")
+    print(f"{'format':<8}{'write s':>10}{'MB':>10}{'load s':>10}{'rows':>12}{'1 veh ms':>10}")
+    for fmt, load, load_one in (("csv", load_csv, load_one_csv), ("npz", load_npz, load_one_npz),
+                                ("sqlite", load_sqlite, load_one_sqlite)):
+        with tempfile.TemporaryDirectory() as folder:
+            folder = Path(folder)
+            begin = time.perf_counter()
+            write_run(fmt, folder, args.vehicles, args.steps, args.batch_rows)
+            written = time.perf_counter() - begin
+
+            begin = time.perf_counter()
+            rows = load(folder)
+            loaded = time.perf_counter() - begin
+
+            begin = time.perf_counter()
+            load_one(folder)
+            one = time.perf_counter() - begin
+            print(f"{fmt:<8}{written:>10.2f}{disk_use(folder) / 1e6:>10.1f}{loaded:>10.2f}{rows:>12}{one * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
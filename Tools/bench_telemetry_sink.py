@@ -0,0 +1,84 @@
+"""
+Benchmark: rows/s of the per-row CSV append of register() vs telemetry.CsvSink.
+
+Writes --steps rows for each of --vehicles tracked vehicles into a temporary
+results folder. The legacy pattern opens results/<veh>.csv in append mode,
+writes one row and closes it; the sink buffers the rows and appends them in
+batches to files kept open. Both folders start with the header files that
+setup_results_and_headers() writes. No SUMO run is needed, the rows are synthetic.
+
+Run from the repository root:
+    python Tools/bench_telemetry_sink.py --vehicles 1000 --steps 100
+"""
+import argparse
+import csv
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from telemetry import CSV_HEADER, CsvSink, format_csv_row
+
+
+def rows_for(step, vehicles):
+    for number in range(vehicles):
+        yield f"veh_{number}", (f"veh_{number}", 36.5 + number % 7, f"E{number % 200}", step * 4.2,
+                                "-E174", 812.3 - step, "evehicle", 64.2, step * 0.5)
+
+
+def write_headers(folder, vehicles):
+    """As setup_results_and_headers(): every tracked vehicle's file exists, with its header, before the run."""
+    for number in range(vehicles):
+        with open(folder / f"veh_{number}.csv", mode="w", newline="", encoding="utf-8") as file:
+            csv.writer(file).writerow(CSV_HEADER)
+
+
+def legacy(folder, vehicles, steps):
+    for step in range(steps):
+        for veh_id, row in rows_for(step, vehicles):
+            with open(folder / f"{veh_id}.csv", mode="a", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(format_csv_row(row))
+
+
+def sink(folder, vehicles, steps, batch_rows, max_open_files):
+    csv_sink = CsvSink(folder, batch_rows, 5.0, max_open_files)
+    for step in range(steps):
+        for veh_id, row in rows_for(step, vehicles):
+            csv_sink.write(veh_id, row)
+    csv_sink.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--batch-rows", type=int, default=5000)
+    parser.add_argument("--max-open-files", type=int, default=256)
+    args = parser.parse_args()
+    total = args.vehicles * args.steps
+
+    results = []
+    with tempfile.TemporaryDirectory() as legacy_dir, tempfile.TemporaryDirectory() as sink_dir:
+        write_headers(Path(legacy_dir), args.vehicles)
+        write_headers(Path(sink_dir), args.vehicles)
+        begin = time.perf_counter()
+        legacy(Path(legacy_dir), args.vehicles, args.steps)
+        results.append(("legacy", time.perf_counter() - begin))
+
+        begin = time.perf_counter()
+        sink(Path(sink_dir), args.vehicles, args.steps, args.batch_rows, args.max_open_files)
+        results.append(("sink", time.perf_counter() - begin))
+
+        same = all((Path(legacy_dir) / f"veh_{n}.csv").read_bytes() == (Path(sink_dir) / f"veh_{n}.csv").read_bytes()
+                   for n in range(args.vehicles))
+
+    print(f"{args.vehicles} vehicles x {args.steps} steps = {total} rows, identical files: {same}")
+    print(f"{'mode':<10}{'seconds':>10}{'rows/s':>12}")
+    for mode, elapsed in results:
+        print(f"{mode:<10}{elapsed:>10.2f}{total / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: TraCI round trips per step of the telemetry collection.
+
+Compares the query sequence that fifthtraffic.register() used to make for each
+tracked vehicle (getIDList, getTypeID, getRouteID, getRoadID, route.getEdges,
+lane.getLength, getDrivingDistance, getSpeed, getElectricityConsumption, two
+getParameter calls and getDistance) with the subscription based
+TelemetryCollector.
+
+Run from the repository root:
+    python Tools/bench_telemetry_subscriptions.py --vehicles 50 --steps 300
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import traci
+import traci.connection
+from sumolib import checkBinary
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from collector import TelemetryCollector
+
+with open(r'config/config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+round_trips = 0
+_sendExact = traci.connection.Connection._sendExact
+
+
+def counting_sendExact(self):
+    global round_trips
+    round_trips += 1
+    return _sendExact(self)
+
+
+traci.connection.Connection._sendExact = counting_sendExact
+
+
+def start():
+    traci.start([
+        checkBinary('sumo'),
+        '--net-file', config["net-file"],
+        '--additional-files', config["additional-files"],
+        '--step-length', config["step"],
+        '--no-step-log', 'true',
+        '--no-warnings', 'true',
+    ])
+
+
+def add_fleet(n_vehicles):
+    edges = [e for e in traci.edge.getIDList() if not e.startswith(":")]
+    added = []
+    for i in range(n_vehicles):
+        for _ in range(20):
+            route = traci.simulation.findRoute(random.choice(edges), random.choice(edges), vType="evehicle")
+            if len(route.edges) > 5:
+                traci.route.add(f"route_veh_{i}", route.edges)
+                traci.vehicle.add(f"veh_{i}", f"route_veh_{i}", typeID="evehicle")
+                added.append(f"veh_{i}")
+                break
+    return added
+
+
+def legacy_step(tracked):
+    for veh_id in tracked:
+        if veh_id in traci.vehicle.getIDList():
+            traci.vehicle.getTypeID(veh_id)
+            route_id = traci.vehicle.getRouteID(veh_id)
+            if traci.vehicle.getRoadID(veh_id).startswith(":"):
+                continue
+            destination = traci.route.getEdges(route_id)[-1]
+            traci.vehicle.getDrivingDistance(veh_id, destination, traci.lane.getLength(f"{destination}_0"))
+            traci.vehicle.getSpeed(veh_id)
+            traci.vehicle.getElectricityConsumption(veh_id)
+            float(traci.vehicle.getParameter(veh_id, "device.battery.capacity"))
+            float(traci.vehicle.getParameter(veh_id, "device.battery.chargeLevel"))
+            traci.vehicle.getDistance(veh_id)
+
+
+def run(mode, n_vehicles, steps):
+    global round_trips
+    random.seed(42)
+    start()
+    tracked = add_fleet(n_vehicles)
+    collector = TelemetryCollector(tracked)
+
+    round_trips = 0
+    begin = time.perf_counter()
+    for _ in range(steps):
+        if mode == "legacy":
+            legacy_step(tracked)
+        else:
+            collector.on_departed(traci.simulation.getDepartedIDList())
+            collector.forget(traci.simulation.getArrivedIDList())
+            collector.collect()
+        traci.simulationStep()
+    elapsed = time.perf_counter() - begin
+    trips = round_trips
+    traci.close()
+    return trips, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicles", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'round trips/step':>18}{'wall time (s)':>16}")
+    for mode in ("legacy", "subscription"):
+        trips, elapsed = run(mode, args.vehicles, args.steps)
+        print(f"{mode:<14}{trips / args.steps:>18.1f}{elapsed:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: time the control loop spends on telemetry, inline sink vs ThreadedSink.
+
+Each step writes one row for each of --vehicles vehicles and then sleeps
+--step-ms to stand in for simulationStep() (waiting on SUMO releases the GIL,
+like the sleep). Every --stall-every flushes the disk "stalls" for --stall-ms
+inside the sink. The loop overhead is the wall time minus the step sleeps.
+
+Run from the repository root:
+    python Tools/bench_telemetry_writer.py --vehicles 1000 --steps 200
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from telemetry import CsvSink, ThreadedSink
+
+
+class StallingCsvSink(CsvSink):
+    def __init__(self, folder, batch_rows, stall_every, stall_ms):
+        super().__init__(folder, batch_rows, 60.0)
+        self.stall_every = stall_every
+        self.stall_ms = stall_ms
+        self.batches = 0
+
+    def write_batch(self, rows):
+        self.batches += 1
+        if self.stall_every and self.batches % self.stall_every == 0:
+            time.sleep(self.stall_ms / 1000)
+        super().write_batch(rows)
+
+
+def run(threaded, args):
+    with tempfile.TemporaryDirectory() as folder:
+        sink = StallingCsvSink(Path(folder), args.batch_rows, args.stall_every, args.stall_ms)
+        if threaded:
+            sink = ThreadedSink(sink, args.queue_size)
+
+        begin = time.perf_counter()
+        for step in range(args.steps):
+            for number in range(args.vehicles):
+                sink.write(f"veh_{number}", (f"veh_{number}", 36.5, f"E{number % 200}", step * 4.2,
+                                             "-E174", 812.3, "evehicle", 64.2, step * 0.5))
+            time.sleep(args.step_ms / 1000)
+        loop = time.perf_counter() - begin - args.steps * args.step_ms / 1000
+
+        begin = time.perf_counter()
+        sink.close()
+        return loop, time.perf_counter() - begin, sink.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--step-ms", type=float, default=20.0)
+    parser.add_argument("--batch-rows", type=int, default=5000)
+    parser.add_argument("--stall-every", type=int, default=4)
+    parser.add_argument("--stall-ms", type=float, default=50.0)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{args.vehicles} vehicles x {args.steps} steps, {args.step_ms} ms per step, "
+          f"{args.stall_ms} ms disk stall every {args.stall_every} flushes")
+    print(f"{'mode':<10}{'loop ms/step':>14}{'close s':>10}")
+    for mode, threaded in (("inline", False), ("thread", True)):
+        loop, closing, stats = run(threaded, args)
+        print(f"{mode:<10}{loop / args.steps * 1000:>14.2f}{closing:>10.2f}")
+        if threaded:
+            print(f"  {stats}")
+
+
+if __name__ == "__main__":
+    main()
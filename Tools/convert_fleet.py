@@ -1,6 +1,7 @@
 import random  # Biblioteca para gerar números aleatórios (sorteio)
 import os      # Biblioteca para lidar com ficheiros e pastas
 import json
+import argparse
 
 """Load config at config/config.json"""
 with open(r'config/config.json', 'r') as config_file:
@@ -11,22 +12,29 @@ with open(r'config/config.json', 'r') as config_file:
 # =============================================================================
 
 # Define a percentagem de veículos que queres converter (0.30 = 30%)
-PROB_CARRO_ELETRICO = 0.30  # 30% dos carros serão elétricos
-PROB_BUS_ELETRICO   = 0.10  # 10% dos autocarros serão elétricos
+# Vêm de "ev-car-share" e "ev-bus-share" no config.json; a linha de comando tem prioridade
+PROB_CARRO_ELETRICO = config.get("ev-car-share", 0.30)  # 30% dos carros serão elétricos
+PROB_BUS_ELETRICO   = config.get("ev-bus-share", 0.10)  # 10% dos autocarros serão elétricos
 
 # Nomes dos ficheiros (Devem estar na mesma pasta do script)
 # 'ARQUIVO_ENTRADA' deve ser o nome do ficheiro que o Activitygen gerou
 ARQUIVO_ENTRADA = config["route-files"]
 ARQUIVO_SAIDA   = config["route-mista"]
 
-def main():
+def main(entrada=ARQUIVO_ENTRADA, saida=ARQUIVO_SAIDA, prob_carro=PROB_CARRO_ELETRICO,
+         prob_bus=PROB_BUS_ELETRICO, seed=None):
+    sorteio = random.Random(seed)  # seed=None: um sorteio diferente a cada execução
+    if prob_bus + prob_carro > 1:
+        print(f"ERRO: ev-bus-share + ev-car-share = {prob_bus + prob_carro:.2f}, não pode passar de 1.")
+        return
+
     # 1. Verificar se o ficheiro original existe para evitar erros
-    if not os.path.exists(ARQUIVO_ENTRADA):
-        print(f"ERRO: O ficheiro '{ARQUIVO_ENTRADA}' não foi encontrado.")
+    if not os.path.exists(entrada):
+        print(f"ERRO: O ficheiro '{entrada}' não foi encontrado.")
         print("Gera o ficheiro com o Activitygen primeiro antes de correr este script.")
         return
 
-    print(f"A processar '{ARQUIVO_ENTRADA}'...")
+    print(f"A processar '{entrada}'...")
 
     # Variáveis para contar quantos veículos foram convertidos (relatório final)
     contador_car_e = 0
@@ -35,18 +43,19 @@ def main():
 
     # 2. Abrir o ficheiro de entrada para ler e o de saída para escrever
     # Usamos 'utf-8' para garantir que caracteres especiais não se percam
-    with open(ARQUIVO_ENTRADA, "r", encoding="utf-8") as f_in, \
-         open(ARQUIVO_SAIDA, "w", encoding="utf-8") as f_out:
+    with open(entrada, "r", encoding="utf-8") as f_in, \
+         open(saida, "w", encoding="utf-8") as f_out:
         
         # 3. Ler o ficheiro linha por linha
         for linha in f_in:
             
-            number = random.random()
-            if number <= PROB_BUS_ELETRICO : 
+            # fatias independentes: [0, prob_bus] vira ElectricBus, (prob_bus, prob_bus + prob_carro] vira evehicle
+            number = sorteio.random()
+            if number <= prob_bus : 
                 linha = linha.replace('type="random"', 'type="ElectricBus"')
                 contador_bus_e += 1
                 total_veiculos += 1
-            elif PROB_BUS_ELETRICO< number <= PROB_CARRO_ELETRICO:
+            elif prob_bus < number <= prob_bus + prob_carro:
                 linha = linha.replace('type="random"', 'type="evehicle"')
                 contador_car_e += 1
                 total_veiculos += 1
@@ -61,9 +70,16 @@ def main():
     print(f"Total de veículos processados: {total_veiculos}")
     print(f"Carros elétricos criados:      {contador_car_e}")
     print(f"Autocarros elétricos criados:  {contador_bus_e}")
-    print(f"Ficheiro guardado como:        {ARQUIVO_SAIDA}")
+    print(f"Ficheiro guardado como:        {saida}")
     print("-" * 50)
 
 # Comando para iniciar o script
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=ARQUIVO_ENTRADA)
+    parser.add_argument("--output", default=ARQUIVO_SAIDA)
+    parser.add_argument("--ev-car-share", type=float, default=PROB_CARRO_ELETRICO)
+    parser.add_argument("--ev-bus-share", type=float, default=PROB_BUS_ELETRICO)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    main(args.input, args.output, args.ev_car_share, args.ev_bus_share, args.seed)
\ No newline at end of file
@@ -0,0 +1,77 @@
+from backend import traci
+
+
+class AttributeCache:
+    """Static attributes of each vehicle, read from SUMO once instead of per use.
+
+    The vType of a vehicle and the vClass, emission class and battery flag of
+    each vType never change during a run. The route ID and its edges are kept
+    until the route changes: when the controller calls change_target(),
+    set_charging_station_stop() or set_parking_area_stop() (which go through
+    this class), or when SUMO reports a new route ID (TelemetryCollector sees
+    it in the subscription and calls route_changed()).
+    """
+
+    def __init__(self):
+        self.types = {}                                                         # veh_id -> vType
+        self.routes = {}                                                        # veh_id -> (route_id, edges)
+        self.type_info = {}                                                     # vType -> (vClass, emission class, has a battery)
+
+    def type_of(self, veh_id):
+        if veh_id not in self.types:
+            self.types[veh_id] = traci.vehicle.getTypeID(veh_id)
+        return self.types[veh_id]
+
+    def info(self, veh_id):
+        veh_type = self.type_of(veh_id)
+        if veh_type not in self.type_info:
+            self.type_info[veh_type] = (
+                traci.vehicletype.getVehicleClass(veh_type),
+                traci.vehicletype.getEmissionClass(veh_type),
+                traci.vehicletype.getParameter(veh_type, "has.battery.device") == "true",
+            )
+        return self.type_info[veh_type]
+
+    def v_class(self, veh_id):
+        return self.info(veh_id)[0]
+
+    def emission_class(self, veh_id):
+        return self.info(veh_id)[1]
+
+    def is_electric(self, veh_id):
+        return self.info(veh_id)[2]
+
+    def route_of(self, veh_id):
+        """(route_id, edges) of the vehicle's current route."""
+        if veh_id not in self.routes:
+            self.routes[veh_id] = (traci.vehicle.getRouteID(veh_id), traci.vehicle.getRoute(veh_id))
+        return self.routes[veh_id]
+
+    def route(self, veh_id):
+        return self.route_of(veh_id)[1]
+
+    def route_changed(self, veh_id, route_id):
+        """SUMO reported route_id for the vehicle: keep it, with its edges, if it is new."""
+        if self.routes.get(veh_id, (None,))[0] != route_id:
+            self.routes[veh_id] = (route_id, traci.vehicle.getRoute(veh_id))
+        return self.routes[veh_id]
+
+    def change_target(self, veh_id, edge_id):
+        traci.vehicle.changeTarget(veh_id, edge_id)
+        self.routes.pop(veh_id, None)
+
+    def set_charging_station_stop(self, veh_id, station_id, **kwargs):
+        traci.vehicle.setChargingStationStop(veh_id, station_id, **kwargs)
+        self.routes.pop(veh_id, None)
+
+    def set_parking_area_stop(self, veh_id, parking_id, **kwargs):
+        traci.vehicle.setParkingAreaStop(veh_id, parking_id, **kwargs)
+        self.routes.pop(veh_id, None)
+
+    def forget(self, veh_ids):
+        for veh_id in veh_ids:
+            self.types.pop(veh_id, None)
+            self.routes.pop(veh_id, None)
+
+
+attributes = AttributeCache()
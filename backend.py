@@ -0,0 +1,88 @@
+import json
+import os
+
+from sumolib import checkBinary
+
+"""Load config at config/config.json"""
+with open(r'config/config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+"""
+Simulation backend, chosen by "backend" in config.json (or SUMO_BACKEND in the environment):
+    "sumo-gui" -> TraCI over a socket to sumo-gui (default)
+    "sumo"     -> TraCI over a socket to headless sumo
+    "libsumo"  -> SUMO running inside this process, no socket serialization
+Every controller imports `traci` from here, so the same code runs on any of them.
+
+Run mode, chosen by "run-mode" in config.json (or RUN_MODE in the environment):
+    "interactive" -> the backend above, with --delay and vehicle colors
+    "production"  -> always headless (sumo-gui becomes sumo), no delay and no visual work
+"""
+BACKENDS = ("sumo-gui", "sumo", "libsumo")
+RUN_MODES = ("interactive", "production")
+BACKEND = os.environ.get("SUMO_BACKEND", config.get("backend", "sumo-gui"))
+RUN_MODE = os.environ.get("RUN_MODE", config.get("run-mode", "interactive"))
+
+if BACKEND not in BACKENDS:
+    raise ValueError(f"Unknown backend '{BACKEND}', use one of {BACKENDS}")
+if RUN_MODE not in RUN_MODES:
+    raise ValueError(f"Unknown run mode '{RUN_MODE}', use one of {RUN_MODES}")
+
+if RUN_MODE == "production" and BACKEND == "sumo-gui":
+    BACKEND = "sumo"
+
+HEADLESS = BACKEND != "sumo-gui"
+
+"""sumo-gui options and how many values each one takes; dropped when there is no viewer"""
+GUI_OPTIONS = {'--delay': 1, '--gui-settings-file': 1, '--start': 0, '--quit-on-end': 0}
+
+if BACKEND == "libsumo":
+    import libsumo as traci
+else:
+    import traci
+
+sumoBinary = checkBinary('sumo-gui' if BACKEND == "sumo-gui" else 'sumo')
+
+
+def start(options, label="default", port=None):
+    """Starts SUMO with the given command line options (without the binary).
+    port=None lets traci pick a free one."""
+    options = list(options)
+    if HEADLESS:
+        options = strip_gui_options(options)
+
+    cmd = [sumoBinary] + options
+    if BACKEND == "libsumo":                                                    # in-process: one simulation, no labels
+        traci.start(cmd)
+    else:
+        traci.start(cmd, port=port, label=label)
+
+
+def strip_gui_options(options):
+    kept = []
+    skip = 0
+    for option in options:
+        if skip:
+            skip -= 1
+        elif option in GUI_OPTIONS:
+            skip = GUI_OPTIONS[option]
+        else:
+            kept.append(option)
+    return kept
+
+
+class Visuals:
+    """GUI side effects (vehicle colors) of the controller."""
+
+    def set_color(self, veh_id, color):
+        traci.vehicle.setColor(veh_id, color)
+
+
+class NoVisuals:
+    """Headless runs: nobody is watching, so every visual side effect is a no-op."""
+
+    def set_color(self, veh_id, color):
+        pass
+
+
+visuals = NoVisuals() if HEADLESS else Visuals()
@@ -0,0 +1,127 @@
+import numpy as np
+
+"""Upper bound (inclusive) of each SoC color bucket, in %; above the last one the battery is full"""
+SOC_EDGES = np.array([14, 28, 42, 56, 70, 85], dtype=np.float64)
+
+"""Color of each bucket, lowest SoC first"""
+BUCKET_COLORS = [
+    (255, 0, 0, 255),      # Vermelho Crítico
+    (255, 69, 0, 255),     # Laranja Avermelhado
+    (255, 165, 0, 255),    # Laranja (Alerta)
+    (255, 255, 0, 255),    # Amarelo (Intermediário)
+    (173, 255, 47, 255),   # Verde Amarelado
+    (127, 255, 0, 255),    # Verde Claro
+    (0, 255, 0, 255),      # Verde (Cheio)
+]
+
+
+def soc_buckets(soc):
+    """Color bucket of each SoC (np.digitize with right=True, so 14% is still critical)."""
+    return np.digitize(soc, SOC_EDGES, right=True)
+
+
+class BatteryTable:
+    """Battery state of the fleet in NumPy arrays, one row per vehicle.
+
+    refresh() loads the capacity and charge of every sampled EV at once and
+    recomputes their SoC in one vector operation. recolor() returns only the
+    vehicles whose color bucket changed, and low() finds the vehicles under a
+    SoC threshold with one comparison. Rows of arrived vehicles are reused.
+
+    The subscription results are from the last simulation step, so a charge
+    the controller wrote with update() after that step is newer: refresh()
+    leaves those rows alone until stepped() says SUMO has advanced.
+    """
+
+    def __init__(self, size=256):
+        self.index = {}                                                         # veh_id -> row
+        self.ids = [None] * size                                                # row -> veh_id
+        self.free = list(range(size - 1, -1, -1))
+        self.capacity = np.full(size, np.nan)
+        self.charge = np.full(size, np.nan)
+        self.soc = np.full(size, np.nan)
+        self.bucket = np.full(size, -1, dtype=np.int8)                          # last color sent, -1 = none yet
+        self.pending = np.zeros(size, dtype=bool)                               # waiting for the departure check
+        self.written = np.zeros(size, dtype=bool)                               # set by update() since the last step
+
+    def grow(self):
+        size = len(self.ids)
+        self.ids.extend([None] * size)
+        self.free.extend(range(2 * size - 1, size - 1, -1))
+        self.capacity = np.concatenate([self.capacity, np.full(size, np.nan)])
+        self.charge = np.concatenate([self.charge, np.full(size, np.nan)])
+        self.soc = np.concatenate([self.soc, np.full(size, np.nan)])
+        self.bucket = np.concatenate([self.bucket, np.full(size, -1, dtype=np.int8)])
+        self.pending = np.concatenate([self.pending, np.zeros(size, dtype=bool)])
+        self.written = np.concatenate([self.written, np.zeros(size, dtype=bool)])
+
+    def rows(self, veh_ids):
+        rows = np.empty(len(veh_ids), dtype=np.intp)
+        for position, veh_id in enumerate(veh_ids):
+            row = self.index.get(veh_id)
+            if row is None:
+                if not self.free:
+                    self.grow()
+                row = self.free.pop()
+                self.index[veh_id] = row
+                self.ids[row] = veh_id
+            rows[position] = row
+        return rows
+
+    def update(self, veh_ids, capacity, charge, pending=False):
+        """Stores the capacity and charge (Wh) the controller just set; returns their rows.
+        pending=True leaves them for the next low() over the whole table."""
+        rows = self.rows(veh_ids)
+        self.capacity[rows] = capacity
+        self.charge[rows] = charge
+        self.soc[rows] = (self.charge[rows] * 100) / self.capacity[rows]
+        self.written[rows] = True
+        if pending:
+            self.pending[rows] = True
+        return rows
+
+    def refresh(self, samples):
+        """Bulk update from TelemetryCollector.collect(); returns the rows of the sampled EVs.
+        Vehicles without a battery are skipped, and rows written by update() keep their values."""
+        veh_ids = [veh_id for veh_id, sample in samples.items() if sample["capacity"] is not None]
+        capacity = np.fromiter((samples[veh_id]["capacity"] for veh_id in veh_ids), np.float64, len(veh_ids))
+        charge = np.fromiter((samples[veh_id]["currentCharge"] for veh_id in veh_ids), np.float64, len(veh_ids))
+        rows = self.rows(veh_ids)
+        fresh = ~self.written[rows]
+        self.capacity[rows[fresh]] = capacity[fresh]
+        self.charge[rows[fresh]] = charge[fresh]
+        self.soc[rows] = (self.charge[rows] * 100) / self.capacity[rows]
+        return rows
+
+    def stepped(self):
+        """SUMO advanced a step: the subscriptions now carry the values written by update()."""
+        self.written[:] = False
+
+    def soc_of(self, veh_id):
+        return float(self.soc[self.index[veh_id]])
+
+    def recolor(self, rows):
+        """[(veh_id, color)] for the vehicles among rows whose color bucket changed."""
+        buckets = soc_buckets(self.soc[rows])
+        changed = buckets != self.bucket[rows]
+        self.bucket[rows[changed]] = buckets[changed]
+        return [(self.ids[row], BUCKET_COLORS[bucket]) for row, bucket in zip(rows[changed], buckets[changed])]
+
+    def low(self, threshold, rows=None):
+        """IDs with SoC under threshold, among rows or among the vehicles waiting for their departure check."""
+        if rows is None:
+            low = np.flatnonzero(self.pending & (self.soc < threshold))         # the whole table at once
+            self.pending[:] = False
+            return [self.ids[row] for row in low]
+        return [self.ids[row] for row in rows[self.soc[rows] < threshold]]
+
+    def forget(self, veh_ids):
+        for veh_id in veh_ids:
+            row = self.index.pop(veh_id, None)
+            if row is None:
+                continue
+            self.ids[row] = None
+            self.capacity[row] = self.charge[row] = self.soc[row] = np.nan
+            self.bucket[row] = -1
+            self.pending[row] = self.written[row] = False
+            self.free.append(row)
@@ -0,0 +1,147 @@
+import zlib
+
+import traci.constants as tc
+
+from backend import traci
+from network import route_lengths
+from attributes import attributes
+
+"""Battery parameters read together with the rest of the telemetry"""
+BATTERY_CAPACITY = "device.battery.capacity"
+BATTERY_CHARGE = "device.battery.chargeLevel"
+
+"""Variables subscribed for each tracked vehicle (one per column of the CSV schema)"""
+TELEMETRY_VARS = [
+    tc.VAR_ROAD_ID,
+    tc.VAR_SPEED,
+    tc.VAR_DISTANCE,
+    tc.VAR_ROUTE_INDEX,
+    tc.VAR_LANEPOSITION,
+    tc.VAR_ROUTE_ID,
+    tc.VAR_ELECTRICITYCONSUMPTION,
+    tc.VAR_PARAMETER,
+    tc.VAR_PARAMETER_WITH_KEY,
+]
+
+"""Vehicles without a battery device: the same columns, minus the battery"""
+BATTERY_VARS = (tc.VAR_ELECTRICITYCONSUMPTION, tc.VAR_PARAMETER, tc.VAR_PARAMETER_WITH_KEY)
+PLAIN_VARS = [var for var in TELEMETRY_VARS if var not in BATTERY_VARS]
+
+"""telemetry-track modes; the controlled fleet (veh_0..N) is recorded in all of them"""
+TRACK_MODES = ("controlled", "all", "ev", "sample")
+
+
+class FleetSelector:
+    """Decides, once per vehicle at departure, whether its telemetry is recorded.
+
+        "controlled" -> only veh_0..N
+        "all"        -> every vehicle, activitygen demand included
+        "ev"         -> every vehicle whose vType has a battery device
+        "sample"     -> a sample_rate share of the vehicles, chosen by a CRC32
+                        of the ID so the same vehicles are picked in every run
+
+    Whether a vType has a battery comes from the AttributeCache.
+    """
+
+    def __init__(self, mode="controlled", controlled=(), sample_rate=0.05):
+        if mode not in TRACK_MODES:
+            raise ValueError(f"unknown telemetry-track {mode!r} (expected one of {', '.join(TRACK_MODES)})")
+        self.mode = mode
+        self.controlled = set(controlled)
+        self.threshold = int(sample_rate * 2 ** 32)
+
+    def __call__(self, veh_id):
+        if veh_id in self.controlled or self.mode == "all":
+            return True
+        if self.mode == "ev":
+            return attributes.is_electric(veh_id)
+        if self.mode == "sample":
+            return zlib.crc32(veh_id.encode()) < self.threshold
+        return False
+
+
+class TelemetryCollector:
+    """Subscribes each tracked vehicle once, at departure, and reads all of
+    them in one batch per step through getAllSubscriptionResults().
+
+    The remaining distance comes from the route's prefix sums (RouteLengths),
+    built when the vehicle is subscribed and again only when its route ID
+    changes, plus the subscribed route index and lane position. The vType and
+    route come from the AttributeCache, so they are not subscribed. A route
+    the controller replaced after the last step is not in the subscription
+    yet: the AttributeCache dropped it, and the new one is read from SUMO.
+
+    tracked is a set of IDs or a FleetSelector. SUMO only accepts one
+    parameter per variable, so the battery capacity is subscribed with
+    VAR_PARAMETER and the charge level with VAR_PARAMETER_WITH_KEY; vehicles
+    without a battery get None in those fields.
+    """
+
+    def __init__(self, tracked):
+        self.tracked = tracked if callable(tracked) else set(tracked).__contains__
+        self.destinations = {}                                                  # veh_id -> (route_id, destination edge)
+        self.electric = set()
+        self.routes = {}                                                        # veh_id -> (edge start offsets, route length)
+
+    def on_departed(self, departed_ids):
+        for veh_id in departed_ids:
+            if self.tracked(veh_id):
+                if attributes.is_electric(veh_id):
+                    self.electric.add(veh_id)
+                self.subscribe(veh_id)
+
+    def subscribe(self, veh_id):
+        self.set_route(veh_id, *attributes.route_of(veh_id))
+        if veh_id in self.electric:
+            traci.vehicle.subscribe(veh_id, TELEMETRY_VARS, parameters={
+                tc.VAR_PARAMETER: BATTERY_CAPACITY,
+                tc.VAR_PARAMETER_WITH_KEY: BATTERY_CHARGE,
+            })
+        else:
+            traci.vehicle.subscribe(veh_id, PLAIN_VARS)
+
+    def set_route(self, veh_id, route_id, route_edges):
+        self.destinations[veh_id] = (route_id, route_edges[-1])
+        self.routes[veh_id] = route_lengths.starts(route_edges)
+
+    def collect(self):
+        """Returns {veh_id: sample} for every tracked vehicle in the network."""
+        samples = {}
+        results = traci.vehicle.getAllSubscriptionResults()
+
+        for veh_id, values in list(results.items()):
+            if veh_id not in self.destinations:
+                continue
+
+            """the route was replaced (changeTarget/reroute): new destination and prefix sums"""
+            route_id = values[tc.VAR_ROUTE_ID]
+            route_index = values[tc.VAR_ROUTE_INDEX]
+            if route_id != self.destinations[veh_id][0]:
+                self.set_route(veh_id, *attributes.route_changed(veh_id, route_id))
+            if attributes.route_of(veh_id)[0] != self.destinations[veh_id][0]:
+                # o controlador trocou a rota depois do último passo: a inscrição ainda traz a antiga
+                route_id = attributes.route_of(veh_id)[0]
+                self.set_route(veh_id, *attributes.route_of(veh_id))
+                route_index = traci.vehicle.getRouteIndex(veh_id)
+
+            electric = veh_id in self.electric
+            starts, route_length = self.routes[veh_id]
+            samples[veh_id] = {
+                "road_id": values[tc.VAR_ROAD_ID],
+                "speed": values[tc.VAR_SPEED],
+                "distance": values[tc.VAR_DISTANCE],
+                "destination": self.destinations[veh_id][1],
+                "remaining": route_length - starts[route_index] - values[tc.VAR_LANEPOSITION],
+                "type": attributes.type_of(veh_id),
+                "route_id": route_id,
+                "electricity": values[tc.VAR_ELECTRICITYCONSUMPTION] if electric else None,
+                "capacity": float(values[tc.VAR_PARAMETER]) if electric else None,
+                "currentCharge": float(values[tc.VAR_PARAMETER_WITH_KEY][1]) if electric else None,
+            }
+        return samples
+
+    def forget(self, arrived_ids):
+        for veh_id in arrived_ids:
+            self.destinations.pop(veh_id, None)
+            self.routes.pop(veh_id, None)
+            self.electric.discard(veh_id)
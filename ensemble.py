@@ -0,0 +1,275 @@
+"""
+Multi-seed ensemble of headless fifthtraffic.py runs on a process pool.
+
+The demand (activitygen + fleet conversion) is prepared once, with the --set
+overrides, and shared by every replication. Each replication runs in a fresh
+worker process, since libsumo holds one simulation per process and the
+controller keeps module singletons. It gets its own seed (for `random` and for SUMO's --seed), its own
+TraCI label and port, and its own folder ensemble/<name>/seed_<n>/ with the
+telemetry, statistic-output, tripinfo-output and the run's log. The KPIs of
+the replications are merged into the mean and a 95% confidence interval
+(Student's t) in summary.csv and summary.json.
+
+Run from the repository root:
+    python ensemble.py --seeds 32
+    SUMO_BACKEND=libsumo python ensemble.py --seeds 8 --name libsumo --set '{"Max_time": 1000}'
+"""
+import os
+os.environ.setdefault("RUN_MODE", "production")                                 # antes de importar backend: réplicas sem GUI
+
+import argparse
+import csv
+import json
+import math
+import random
+import statistics
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+import fifthtraffic
+from planner import plan_fleet
+from telemetry import load_run
+
+"""Load config at config/config.json"""
+with open(r'config/config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+BASE_DIR = Path(__file__).resolve().parent
+
+"""Attributes of statistic-output used as KPIs, by element"""
+STATISTIC_KPIS = {
+    "vehicles": ("loaded", "inserted", "running", "waiting"),
+    "teleports": ("total",),
+    "safety": ("collisions", "emergencyStops"),
+    "vehicleTripStatistics": ("count", "routeLength", "speed", "duration", "waitingTime", "timeLoss", "departDelay"),
+}
+
+"""Attributes of the controlled fleet's tripinfos averaged as KPIs"""
+TRIPINFO_KPIS = ("duration", "routeLength", "waitingTime", "timeLoss", "stopTime")
+
+"""Two-sided 95% quantiles of Student's t by degrees of freedom; past the last one, the normal's"""
+T_975 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+         10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110,
+         18: 2.101, 19: 2.093, 20: 2.086, 21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060,
+         26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+
+
+def t_quantile(df):
+    """Largest tabulated df not above df, so the interval errs on the wide side."""
+    if df > max(T_975):
+        return 1.960
+    return T_975[max(limit for limit in T_975 if limit <= df)]
+
+
+"""Keys read when the modules are imported (backend choice, and the net indexes and route cache built
+from the net and additional files): a run cannot override them, config.json has to be edited instead"""
+IMPORT_TIME_KEYS = ("backend", "run-mode", "net-file", "additional-files", "RESTRICTED_TYPES",
+                    "cache-dir", "route-cache-size", "route-cache-persist")
+
+
+def check_overrides(overrides):
+    unknown = sorted(key for key in overrides if key not in config)
+    if unknown:
+        raise ValueError(f"{', '.join(unknown)} not in config.json: an unknown key would run the base config unchanged")
+    fixed = sorted(key for key in overrides if key in IMPORT_TIME_KEYS)
+    if fixed:
+        raise ValueError(f"{', '.join(fixed)} cannot be overridden per run: network.py and routing.py "
+                         f"build their indexes from config.json at import; edit config.json instead")
+
+
+def apply_overrides(overrides):
+    """Config overrides for every module of the repository that keeps its copy of config.json.
+    Only keys read at run time take effect (see IMPORT_TIME_KEYS)."""
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and Path(path).resolve().is_relative_to(BASE_DIR) and isinstance(getattr(module, "config", None), dict):
+            module.config.update(overrides)
+
+
+def prepare_demand():
+    """activitygen and the fleet conversion, once for the whole ensemble."""
+    fifthtraffic.generate_activity_trips()
+    fifthtraffic.apply_fleet_conversion()
+
+
+def run_replication(job):
+    """Worker: one run of fifthtraffic.simulation() in its own folder; returns (seed, KPIs).
+    With own_fleet the fleet is converted for this run (its seed, the configured EV shares)."""
+    seed, folder, label, port, overrides, own_fleet = job
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = {
+        "results-dir": str(folder / "results"),
+        "statistic-output": str(folder / "statistics.xml"),
+        "tripinfo-output": str(folder / "tripinfo.xml"),
+        "planned-routes": str(folder / "planned_routes.rou.xml"),
+        "sumo-seed": seed,
+    }
+    if own_fleet:
+        paths.update({"route-mista": str(folder / "routes_mista.trip.xml"), "fleet-seed": seed})
+    apply_overrides({**overrides, **paths})
+    random.seed(seed)
+
+    begin = time.perf_counter()
+    with open(folder / "run.log", "w", encoding="utf-8") as log, redirect_stdout(log):
+        if own_fleet:
+            fifthtraffic.apply_fleet_conversion()
+        fifthtraffic.setup_results_and_headers()
+        planned_departures = None
+        if fifthtraffic.config.get("precompute-routes", False):
+            planned_departures = plan_fleet(1)                                  # a réplica já ocupa um núcleo
+        fifthtraffic.startSim(label, port)
+        fifthtraffic.simulation(planned_departures)
+    wall = time.perf_counter() - begin
+
+    kpis = {"wall_seconds": wall}
+    kpis.update(statistic_kpis(folder / "statistics.xml"))
+    kpis.update(tripinfo_kpis(folder / "tripinfo.xml"))
+    kpis.update(telemetry_kpis(folder / "results", fifthtraffic.config.get("telemetry-format", "csv")))
+    return seed, kpis
+
+
+def statistic_kpis(path):
+    root = ET.parse(path).getroot()
+    kpis = {}
+    for tag, names in STATISTIC_KPIS.items():
+        element = root.find(tag)
+        if element is None:
+            continue
+        for name in names:
+            if element.get(name) is not None:
+                kpis[f"{tag}.{name}"] = float(element.get(name))
+    return kpis
+
+
+def tripinfo_kpis(path):
+    """Trips of the controlled fleet (veh_0..N): how many finished and their means."""
+    values = {name: [] for name in TRIPINFO_KPIS}
+    for _, element in ET.iterparse(path):
+        if element.tag == "tripinfo" and element.get("id", "").startswith("veh_"):
+            for name in TRIPINFO_KPIS:
+                values[name].append(float(element.get(name)))
+        element.clear()
+
+    kpis = {"fleet.trips": float(len(values["duration"]))}
+    for name, column in values.items():
+        kpis[f"fleet.{name}"] = statistics.fmean(column) if column else math.nan
+    return kpis
+
+
+def telemetry_kpis(results_dir, fmt):
+    columns = load_run(results_dir, fmt)
+    kpis = {"telemetry.rows": float(len(columns["timestamp"])),
+            "telemetry.vehicles": float(len(np.unique(columns["veh_id"])))}
+    if not len(columns["timestamp"]):
+        return kpis
+
+    kpis["telemetry.speed_kmh"] = float(columns["speed_kmh"].mean())
+    order = np.lexsort((columns["timestamp"], columns["veh_id"]))
+    veh_ids, soc = columns["veh_id"][order], columns["soc"][order]
+    last = np.append(veh_ids[1:] != veh_ids[:-1], True)                        # última linha de cada veículo
+    final_soc = soc[last][~np.isnan(soc[last])]
+    if len(final_soc):
+        kpis["telemetry.final_soc"] = float(final_soc.mean())
+        kpis["telemetry.min_soc"] = float(np.nanmin(soc))
+    return kpis
+
+
+def summarize(results):
+    """{kpi: {n, mean, std, ci_low, ci_high}} over the replications that reported it."""
+    summary = {}
+    for name in sorted({name for kpis in results.values() for name in kpis}):
+        values = [kpis[name] for kpis in results.values() if not math.isnan(kpis.get(name, math.nan))]
+        if not values:
+            continue
+        mean = statistics.fmean(values)
+        std = statistics.stdev(values) if len(values) > 1 else math.nan
+        half = t_quantile(len(values) - 1) * std / math.sqrt(len(values)) if len(values) > 1 else math.nan
+        summary[name] = {"n": len(values), "mean": mean, "std": std, "ci_low": mean - half, "ci_high": mean + half}
+    return summary
+
+
+def write_summary(folder, seeds, overrides, results, failed, summary):
+    with open(folder / "summary.json", "w", encoding="utf-8") as file:
+        json.dump({"seeds": seeds, "overrides": overrides, "failed": failed,
+                   "replications": {str(seed): kpis for seed, kpis in sorted(results.items())},
+                   "summary": summary}, file, indent=2)
+    with open(folder / "summary.csv", mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["kpi", "n", "mean", "std", "ci_low", "ci_high"])
+        for name, row in summary.items():
+            writer.writerow([name, row["n"], row["mean"], row["std"], row["ci_low"], row["ci_high"]])
+
+
+def run_pool(jobs, workers=None):
+    """Runs the replications on a process pool; yields (job, kpis, error) as they finish."""
+    # um processo novo por réplica: libsumo e os singletons do controlador não são reaproveitados
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        futures = {pool.submit(run_replication, job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                _, kpis = future.result()
+            except Exception as error:
+                yield futures[future], None, error
+            else:
+                yield futures[future], kpis, None
+
+
+def run_ensemble(seeds, name="default", workers=None, base_port=None, overrides=None, prepare=True):
+    """Runs one replication per seed and writes the summary; returns (summary, results)."""
+    overrides = overrides or {}
+    check_overrides(overrides)
+    folder = BASE_DIR / config.get("ensemble-dir", "ensemble") / name
+    folder.mkdir(parents=True, exist_ok=True)
+    apply_overrides(overrides)                                                  # a demanda comum usa as mesmas sobrescritas das réplicas
+    if prepare:
+        prepare_demand()
+
+    jobs = [(seed, str(folder / f"seed_{seed}"), f"rep_{seed}",
+             base_port + index if base_port is not None else None, overrides, False)
+            for index, seed in enumerate(seeds)]
+    results, failed = {}, {}
+    for done, (job, kpis, error) in enumerate(run_pool(jobs, workers), 1):
+        seed = job[0]
+        if error is not None:
+            failed[seed] = repr(error)
+            print(f"✗ seed {seed}: {error!r}")
+            continue
+        results[seed] = kpis
+        print(f"✓ seed {seed} em {kpis['wall_seconds']:.1f} s ({done}/{len(jobs)})")
+
+    summary = summarize(results)
+    write_summary(folder, list(seeds), overrides, results, failed, summary)
+    return summary, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seeds", type=int, default=8, help="number of replications")
+    parser.add_argument("--first-seed", type=int, default=1)
+    parser.add_argument("--name", default="default", help="folder under ensemble-dir")
+    parser.add_argument("--workers", type=int, default=None, help="default: every core")
+    parser.add_argument("--port", type=int, default=None, help="first TraCI port; default: any free port")
+    parser.add_argument("--set", default="{}", help="JSON object of config.json overrides")
+    parser.add_argument("--skip-prepare", action="store_true", help="reuse the demand files already generated")
+    args = parser.parse_args()
+
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    summary, results = run_ensemble(seeds, args.name, args.workers, args.port, json.loads(args.set),
+                                    not args.skip_prepare)
+
+    print(f"{len(results)}/{len(seeds)} réplicas, resumo em {config.get('ensemble-dir', 'ensemble')}/{args.name}")
+    print(f"{'kpi':<36}{'n':>4}{'mean':>14}{'95% CI':>30}")
+    for name, row in summary.items():
+        interval = f"[{row['ci_low']:.3f}, {row['ci_high']:.3f}]"
+        print(f"{name:<36}{row['n']:>4}{row['mean']:>14.3f}{interval:>30}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+import traci.constants as tc
+
+from backend import traci
+
+"""Vehicle state changes published by the bus"""
+DEPARTED = "departed"
+ARRIVED = "arrived"
+STOP_STARTING = "stop-starting"
+STOP_ENDING = "stop-ending"
+PARKING_STARTING = "parking-starting"
+PARKING_ENDING = "parking-ending"
+
+"""simulation variables behind the stop/parking events (departed/arrived come from the StepSnapshot)"""
+STOP_VARS = {
+    STOP_STARTING: tc.VAR_STOP_STARTING_VEHICLES_IDS,
+    STOP_ENDING: tc.VAR_STOP_ENDING_VEHICLES_IDS,
+    PARKING_STARTING: tc.VAR_PARKING_STARTING_VEHICLES_IDS,
+    PARKING_ENDING: tc.VAR_PARKING_ENDING_VEHICLES_IDS,
+}
+
+
+class EventBus:
+    """Publishes SUMO's per-step vehicle state lists to subscribed handlers.
+
+    The stop/parking lists come with each simulationStep() through a simulation
+    subscription, so the controller reacts to what changed instead of polling
+    every parking area and charging station.
+    """
+
+    def __init__(self):
+        self.handlers = defaultdict(list)
+        traci.simulation.subscribe(list(STOP_VARS.values()))
+
+    def subscribe(self, kind, handler):
+        """handler(veh_ids) is called with the IDs that changed state in the last step."""
+        self.handlers[kind].append(handler)
+
+    def publish(self, kind, veh_ids):
+        if veh_ids:
+            for handler in self.handlers[kind]:
+                handler(veh_ids)
+
+    def poll(self, snapshot):
+        results = traci.simulation.getSubscriptionResults() or {}
+        self.publish(DEPARTED, snapshot.departed)
+        for kind, var in STOP_VARS.items():
+            self.publish(kind, results.get(var, ()))
+        self.publish(ARRIVED, snapshot.arrived)
@@ -1,14 +1,24 @@
-import traci
-from sumolib import checkBinary
 import json
+import math
 import random
 from pathlib import Path
 import csv
 import subprocess
 import sys
 import os
-
-sumoBinary = checkBinary('sumo-gui')
+from backend import traci, start, visuals
+from collector import TelemetryCollector, FleetSelector
+from snapshot import StepSnapshot
+from network import routable_edges, facilities, charging_planner
+from routing import route_cache
+from planner import plan_fleet
+from scheduler import EventScheduler, EPSILON, BATTERY_CHECK, PARKING_TRIGGER, DEPARTURE, PLANNED_DEPARTURE
+from events import EventBus, STOP_STARTING, STOP_ENDING, ARRIVED
+from telemetry import open_sink, ThreadedSink, CSV_HEADER
+from sampling import SamplingPolicy
+from battery import BatteryTable
+from attributes import attributes
+from registry import VehicleRegistry
 
 """Load config at config/config.json"""
 with open(r'config/config.json', 'r') as config_file:
@@ -16,17 +26,20 @@ with open(r'config/config.json', 'r') as config_file:
 
 def main():
     """initial functions"""
-    function_initializer()
+    planned_departures = function_initializer()
     
     """Simulation"""
-    simulation()
+    simulation(planned_departures)
 
 def function_initializer():
     setup_results_and_headers()
     generate_activity_trips()
     apply_fleet_conversion()
+    planned_departures = None
+    if config.get("precompute-routes", False):
+        planned_departures = plan_fleet(config.get("planner-workers"))
     startSim()
-    return
+    return planned_departures
 
 
 def setup_results_and_headers():
@@ -34,7 +47,7 @@ def setup_results_and_headers():
     list_vehicles = [f"veh_{i}" for i in range(config["vehicles_number"])]
 
     base_dir = Path(__file__).resolve().parent
-    pasta_results = base_dir / "results"
+    pasta_results = base_dir / config.get("results-dir", "results")
     
     if not pasta_results.exists():
         pasta_results.mkdir(parents=True, exist_ok=True)
@@ -44,24 +57,15 @@ def setup_results_and_headers():
             if item.is_file():
                 item.unlink()
 
-    cabecalho = [
-        "== ID ==",
-        "== Velocity (Kh/h) ==",
-        "== Atual route ==",
-        "== Distance traveled(m) ==",
-        "== Destination ==",
-        "== Distance from destination(m) ==",
-        "== TYPE ==",
-        "== Batery level(%) ==",
-        "== timestamp =="
-    ]
+    if config.get("telemetry-format", "csv") != "csv": # colunar: as linhas vão para results/telemetry
+        return
 
     for veiculo_id in list_vehicles:
         arquivo_csv = pasta_results / f"{veiculo_id}.csv"
         
         with open(arquivo_csv, mode="w", newline="", encoding="utf-8") as file:
             writer = csv.writer(file)
-            writer.writerow(cabecalho)
+            writer.writerow(CSV_HEADER)
             
 def generate_activity_trips():
     """
@@ -101,7 +105,13 @@ def apply_fleet_conversion():
 
     # 2. Monta o comando usando o executável do Python atual
     # Isso garante que bibliotecas como 'random' e 'os' funcionem corretamente
-    cmd = [sys.executable, script_path]
+    cmd = [sys.executable, script_path,
+           "--input", config["route-files"],
+           "--output", config["route-mista"],
+           "--ev-car-share", str(config.get("ev-car-share", 0.30)),
+           "--ev-bus-share", str(config.get("ev-bus-share", 0.10))]
+    if config.get("fleet-seed") is not None: # mesma frota a cada execução
+        cmd += ["--seed", str(config["fleet-seed"])]
 
     try:
         # Verifica se o ficheiro existe antes de tentar rodar
@@ -125,13 +135,17 @@ def apply_fleet_conversion():
     except Exception as e:
         print(f"Ocorreu um erro inesperado: {e}")
 
-"""Starts the simulation."""
-def startSim():
-    traci.start(
+"""Starts the simulation; label and port tell apart the TraCI connections of parallel runs."""
+def startSim(label="default", port=None):
+    route_files = config["route-mista"]
+    if config.get("precompute-routes", False):
+        route_files += "," + config["planned-routes"]
+    seed = ['--seed', config["sumo-seed"]] if config.get("sumo-seed") is not None else []
+
+    options = (
         [
-            sumoBinary,
             '--net-file', config["net-file"],
-            '--route-files', config["route-mista"],
+            '--route-files', route_files,
             '--additional-files', config["additional-files"],
             '--step-length', config["step"], 
             '--delay', config["delay"],
@@ -141,85 +155,147 @@ def startSim():
             '--gui-settings-file', config["gui-settings-file"],
             '--start',      
             '--quit-on-end' 
-        ]
+        ] + seed
     )
+    # valores do config.json podem ser números (ex.: "step": 1.0 numa varredura); o SUMO recebe texto
+    start([str(option) for option in options], label, port)
 
-def simulation():
+def simulation(planned_departures=None):
 
     """Variables"""
     MAX_TIME = config["Max_time"] 
-    vehicles_programming = {} 
-    all_vehicles = []
-    set_battery_vehicles =[]
+    STEP = float(config["step"])
+    SAMPLE_EVERY = float(config.get("telemetry-interval") or STEP * config.get("telemetry-every-steps", 1))
+    SKIP = config.get("step-skipping", False)
+    next_sample = 0.0
+    waiting_departure = set()
+    tracked = {f"veh_{i}" for i in range(config["vehicles_number"])}
     vehicles_that_return = {}
+    stopped_at = {}
     key_time = random.randint(0, MAX_TIME)
-    veiculos_preComputados = []
-
+    registry = VehicleRegistry()
+    battery = BatteryTable()
+    collector = TelemetryCollector(FleetSelector(config.get("telemetry-track", "controlled"), tracked,
+                                                 config.get("telemetry-sample-rate", 0.05)))
+    snapshot = StepSnapshot().refresh()
+    # tabelas de distância até as estações, antes do primeiro veículo com pouca carga
+    charging_planner.prepare({traci.vehicletype.getVehicleClass(veh_type) for veh_type in config["vehicles"]})
+    scheduler = EventScheduler()
+    bus = EventBus()
+    sink = open_sink(config.get("telemetry-format", "csv"), Path(__file__).resolve().parent / config.get("results-dir", "results"),
+                     config.get("telemetry-batch-rows", 5000), config.get("telemetry-flush-seconds", 5.0))
+    if config.get("telemetry-writer-thread", False): # formatação e escrita fora do laço de controle
+        sink = ThreadedSink(sink, config.get("telemetry-queue-size", 10000))
+    sampling = SamplingPolicy(config.get("telemetry-delta-speed"), config.get("telemetry-delta-soc"),
+                              config.get("telemetry-on-edge-change", False), config.get("telemetry-max-rate"))
+
+    bus.subscribe(STOP_STARTING, lambda ids: on_stop_starting(ids, vehicles_that_return, stopped_at, snapshot.active))
+    bus.subscribe(STOP_ENDING, lambda ids: on_stop_ending(ids, vehicles_that_return, stopped_at))
+    bus.subscribe(ARRIVED, lambda ids: on_arrived(ids, vehicles_that_return, stopped_at))
+
+    scheduler.schedule(key_time, PARKING_TRIGGER)
     for id_provisional in range(config["vehicles_number"]): #adiciona o numero de veículos solicitados
-        time = random.randint(0, MAX_TIME)
         veh_id = f"veh_{id_provisional}"
-        if time not in vehicles_programming: 
-            vehicles_programming[time] = []
-        vehicles_programming[time].append(veh_id)
-        all_vehicles.append(veh_id)
-        set_battery_vehicles.append(veh_id)
-
-    while traci.simulation.getTime() != MAX_TIME:
-        actual_time = int(traci.simulation.getTime()) #parte inteira do tempo atual
-        
-        if actual_time in vehicles_programming:
-            for vid in vehicles_programming[actual_time]:
-                addRandomVehicle(vid)
-                print(f"Veículo {vid} aparecerá no tempo {actual_time}")    
-            del vehicles_programming[actual_time]
-
-        for active_vid in all_vehicles :
-            if active_vid in traci.vehicle.getIDList():
-                v_type = traci.vehicle.getTypeID(active_vid)
-                r_id = traci.vehicle.getRouteID(active_vid)
-                vehicles_that_return = register(active_vid, traci.simulation.getTime(), v_type, r_id,vehicles_that_return)
-
-         
-        if traci.simulation.getLoadedIDList() :
-            for veh_id in traci.simulation.getLoadedIDList() :
-                if not veh_id in veiculos_preComputados : 
-                    veiculos_preComputados.append(veh_id)
-        
-        traci.simulationStep()
-        
-        for change_battery in set_battery_vehicles[:] : 
-            if change_battery in traci.vehicle.getIDList():
-                
-                route_id = traci.vehicle.getRouteID(change_battery)
-                capacity = float(traci.vehicle.getParameter(change_battery, "device.battery.capacity"))
-                current_charge = float(traci.vehicle.getParameter(change_battery, "device.battery.chargeLevel"))
+        if not config.get("precompute-routes", False): # rotas planejadas já estão no arquivo carregado pelo SUMO
+            scheduler.schedule(random.randint(0, MAX_TIME), DEPARTURE, veh_id)
+    # frota planejada: um passo antes da partida, para o pulo de passos não atravessar a viagem inteira
+    for veh_id, depart in (planned_departures or {}).items():
+        scheduler.schedule(max(0.0, depart - STEP), PLANNED_DEPARTURE, veh_id)
+
+    while True:
+        for event_time, kind, veh in scheduler.due(snapshot.time):
+            if kind == BATTERY_CHECK:
+                if veh not in snapshot.active: # partiu e chegou dentro de um intervalo pulado
+                    continue
+                capacity = float(traci.vehicle.getParameter(veh, "device.battery.capacity"))
+                current_charge = float(traci.vehicle.getParameter(veh, "device.battery.chargeLevel"))
                     
-                NEWcurrent_charge = set_baterychargelevel(change_battery, current_charge)
-    
-                if level_charge(NEWcurrent_charge,capacity) < 25:
-                    Olddestination = recharge_substation(change_battery, route_id)
-                    vehicles_that_return[change_battery] = Olddestination
-       
-                set_battery_vehicles.remove(change_battery)
-        
-        for veh in list(vehicles_that_return.keys()):  
-                    destino_original, id_estacao, ja_carregou = vehicles_that_return[veh]
+                NEWcurrent_charge = set_baterychargelevel(veh, current_charge)
+                battery.update([veh], [capacity], [NEWcurrent_charge], pending=True)
+
+            elif kind == PARKING_TRIGGER:
+                maybe_parking(snapshot.ids)
+                maybe_charge(snapshot.ids, registry, battery)
+
+            elif kind == DEPARTURE:
+                route_id, _ = addRandomVehicle(veh)
+                if route_id:
+                    registry.add(veh, snapshot.time) # adicionados via TraCI não aparecem na lista de carregados
+                    waiting_departure.add(veh)
+                print(f"Veículo {veh} aparecerá no tempo {int(event_time)}")    
+
+            elif kind == PLANNED_DEPARTURE:
+                if veh not in snapshot.active:
+                    waiting_departure.add(veh)
+
+        for veh in battery.low(25): # veículos que acabaram de partir com pouca carga
+            Olddestination = recharge_substation(veh)
+            if Olddestination:
+                vehicles_that_return[veh] = Olddestination
+
+        if snapshot.time >= MAX_TIME - EPSILON:
+            break
 
-                    if (veh not in traci.chargingstation.getVehicleIDs(id_estacao)) and ja_carregou:
+        collector.on_departed(snapshot.departed & snapshot.active) # sem os que já chegaram no intervalo pulado
+        collector.forget(snapshot.arrived)
+        battery.forget(snapshot.arrived)
+        attributes.forget(snapshot.arrived)
+        sampling.forget(snapshot.arrived)
+        active = len(collector.destinations)
+        sampled = snapshot.time >= next_sample - EPSILON
+        if sampled:
+            samples = collector.collect()
+            rows = battery.refresh(samples)
+            for veh_id, color in battery.recolor(rows): # só quem mudou de faixa de carga
+                visuals.set_color(veh_id, color)
+            for active_vid, sample in samples.items():
+                register(active_vid, snapshot.time, sample, sink, sampling, battery)
+            next_sample = (math.floor(snapshot.time / SAMPLE_EVERY + EPSILON) + 1) * SAMPLE_EVERY # mesma grade com ou sem pulos
 
-                        traci.vehicle.changeTarget(veh, destino_original)
-                        del vehicles_that_return[veh]
-                        print(f"Veículo {veh} carregado. Retornando para {destino_original}")
-                
-        if actual_time > MAX_TIME:
-            break
         
+        if SKIP:
+            # SUMO roda sozinho até a próxima ação do controlador
+            traci.simulationStep(next_action_time(snapshot.time, STEP, MAX_TIME, scheduler,
+                                                  next_sample if collector.destinations else None,
+                                                  waiting_departure, vehicles_that_return))
+        else:
+            traci.simulationStep()
+        previous_time = snapshot.time
+        snapshot.refresh()
+        battery.stepped()
+        sampling.on_step(active, sampled, max(1, round((snapshot.time - previous_time) / STEP)))
         
-        if key_time == traci.simulation.getTime() :
-            maybe_parking(traci.vehicle.getIDList())
-            maybe_charge(traci.vehicle.getIDList(),veiculos_preComputados)
+        # antes dos eventos: com passos pulados a lista cobre todo o intervalo
+        registry.update(snapshot)
+
+        bus.poll(snapshot)
+        waiting_departure -= snapshot.departed
+        for veh_id in snapshot.departed & tracked :
+            scheduler.schedule(snapshot.time, BATTERY_CHECK, veh_id)
+
+    sink.close()
+    print(f"Gravação de telemetria: {sink.stats()}")
+    route_cache.save()
+    print(f"Cache de rotas: {route_cache.stats()}")
+    print(f"Amostragem de telemetria: {sampling.stats()}")
+    print(f"Registro de veículos: {registry.stats()}")
     traci.close()
 
+"""Time of the next controller action: a due event, a telemetry sample, a vehicle about to depart or a recharge stop"""
+def next_action_time(now, step, max_time, scheduler, next_sample, waiting_departure, returning):
+    if waiting_departure: # a partida precisa ser vista no passo em que acontece
+        return now + step
+    if returning: # a parada de recarga pode começar e terminar dentro do intervalo: o retorno ao destino se perderia
+        return now + step
+
+    candidates = [max_time]
+    if scheduler.next_time() is not None:
+        candidates.append(scheduler.next_time())
+    if next_sample is not None:
+        candidates.append(next_sample)
+
+    return max(min(candidates), now + step)
+
 """Create a vehicle with origin and destination """
 def addRandomVehicle(veh_id):
     veh_type = random.choice(config["vehicles"])                                            
@@ -233,13 +309,13 @@ def addRandomVehicle(veh_id):
         while to_edge == from_edge: 
            to_edge = random.choice(edges)
 
-        route = traci.simulation.findRoute(from_edge, to_edge, vType=veh_type)
+        route_edges = route_cache.find(from_edge, to_edge, veh_type)
 
-        if not route.edges:
+        if not route_edges:
             continue 
 
         if route_id not in traci.route.getIDList():
-            traci.route.add(route_id, route.edges)
+            traci.route.add(route_id, route_edges)
         
         if veh_id not in traci.vehicle.getIDList():
             traci.vehicle.add(
@@ -251,18 +327,14 @@ def addRandomVehicle(veh_id):
 
         if veh_type in ["bus","ElectricBus"]:
             
-            if traci.busstop.getIDList() :
-                stop_id = random.choice(traci.busstop.getIDList())
-                if busStopIsOnRoute(route.edges, stop_id):
-                    traci.vehicle.setBusStop(veh_id, stop_id, duration=10)
+            stop_id = facilities.select_on_route("busStop", route_edges)
+            if stop_id:
+                traci.vehicle.setBusStop(veh_id, stop_id, duration=10)
 
         else:
-            all_parkings = traci.parkingarea.getIDList()
-            if all_parkings:
-                parkingID = random.choice(all_parkings)
-
-                if parkingIsOnRoute(route.edges, parkingID):
-                    traci.vehicle.setParkingAreaStop(veh_id, parkingID, duration=10)
+            parkingID = facilities.select_on_route("parkingArea", route_edges, parking_weight())
+            if parkingID:
+                attributes.set_parking_area_stop(veh_id, parkingID, duration=10)
 
         return route_id, veh_type 
 
@@ -271,174 +343,147 @@ def addRandomVehicle(veh_id):
 
 """Surch the edges for routes"""
 def possible_routes(veh_type):
-    valid_edges = []
-    for edge in traci.edge.getIDList():
-        if edge.startswith(":"): # ignore internals edges
-            continue
-        if traci.edge.getLaneNumber(edge) == 0: 
-            continue
-        
-        for i in range(traci.edge.getLaneNumber(edge)): 
-            lane_id = f"{edge}_{i}"
-            allowed = traci.lane.getAllowed(lane_id)
-            
-            if not allowed:
-                if veh_type not in config.get("RESTRICTED_TYPES", []):
-                    valid_edges.append(edge)
-                    break
-            else: 
-                if veh_type in allowed:
-                    valid_edges.append(edge)
-                    break
-    return valid_edges
-
-"""Verify if there is parking on route"""
-def parkingIsOnRoute(route_edges, parkingID):
-    lane_id = traci.parkingarea.getLaneID(parkingID)
-    edge_id = lane_id.split("_")[0]
-    return edge_id in route_edges
-
-def register(veh_id, TIME, TYPE, ID_ROUTE,VTR):
-    base_dir = Path(__file__).resolve().parent
-    arquivo_csv = base_dir / "results" / f"{veh_id}.csv"
+    return routable_edges.edges(veh_type)
 
-    road_id = traci.vehicle.getRoadID(veh_id)
-    if road_id.startswith(":"):
-        return VTR
+"""Weight for parking selection: free places when "parking-by-free-capacity" is set, uniform otherwise"""
+def parking_weight():
+    if not config.get("parking-by-free-capacity", False):
+        return None
+    return lambda parkingID: facilities.capacity_of[parkingID] - traci.parkingarea.getVehicleCount(parkingID)
 
-    
-    route_edges = traci.route.getEdges(ID_ROUTE)
-    destination = route_edges[-1]
+def register(veh_id, TIME, sample, sink, sampling, battery):
+    road_id = sample["road_id"]
+    if road_id.startswith(":"):
+        return
 
-    dist = traci.vehicle.getDrivingDistance(
-        vehID=veh_id,
-        edgeID=destination,
-        pos=traci.lane.getLength(f"{destination}_0")
-    )
+    destination = sample["destination"]
+    dist = sample["remaining"]
 
-    v_kmh = traci.vehicle.getSpeed(veh_id) * 3.6
+    v_kmh = sample["speed"] * 3.6
 
     eletric_informations = {
-        "electricity": traci.vehicle.getElectricityConsumption(veh_id),
-        "capacity": float(traci.vehicle.getParameter(veh_id, "device.battery.capacity")),
-        "currentCharge": float(traci.vehicle.getParameter(veh_id, "device.battery.chargeLevel"))
+        "electricity": sample["electricity"],
+        "capacity": sample["capacity"],
+        "currentCharge": sample["currentCharge"]
     }                                           
 
-    eletric_informations["stateOfCharge"] = level_charge(eletric_informations["currentCharge"],eletric_informations["capacity"])
-
-
-    """Logic for change color based in legel charge"""
-    cor_level = get_color_by_battery(eletric_informations["stateOfCharge"])
-    traci.vehicle.setColor(veh_id, cor_level)
-     
-    with open(arquivo_csv, mode="a", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow([
-            veh_id,
-            "{:.1f}".format(v_kmh),
-            road_id,
-            "{:.1f}".format(traci.vehicle.getDistance(veh_id)),
-            destination,
-            "{:.1f}".format(dist),
-            TYPE,
-            "{:.1f}".format(eletric_informations["stateOfCharge"]),
-            TIME       
-        ]) 
-
-    """parking logic"""
-    for PARKING in traci.parkingarea.getIDList():
-        veiculos_estacionados = traci.parkingarea.getVehicleIDs(PARKING)
-        for VID in veiculos_estacionados:
-            print(f"veículo {VID} estacionado em {PARKING}")
-    
-    """charging station logic"""
-    for STATION in traci.chargingstation.getIDList():
-        veiculos_carregando = traci.chargingstation.getVehicleIDs(STATION)
-        for VID in veiculos_carregando:
-            print(f"veículo {VID} na estação de carregamento {STATION}")
-            if VID in VTR : 
+    if eletric_informations["capacity"] is None: # veículo da frota sem bateria (telemetry-track)
+        eletric_informations["stateOfCharge"] = float("nan")
+    else:
+        eletric_informations["stateOfCharge"] = battery.soc_of(veh_id)
+
+    if not sampling.keep(veh_id, TIME, v_kmh, eletric_informations["stateOfCharge"], road_id):
+        return
+
+    sink.write(veh_id, (
+        veh_id,
+        v_kmh,
+        road_id,
+        sample["distance"],
+        destination,
+        dist,
+        sample["type"],
+        eletric_informations["stateOfCharge"],
+        TIME
+    ))
+
+"""Stop events: logging, and the return of vehicles sent to recharge"""
+def on_stop_starting(veh_ids, VTR, stopped_at, active):
+    for VID in veh_ids:
+        if VID not in active: # com passos pulados, parou e saiu da rede dentro do intervalo
+            continue
+        stops = traci.vehicle.getStops(VID, 1)
+        if not stops or stops[0].arrival < 0: # a parada já terminou no intervalo pulado: stops[0] é a próxima
+            continue
+        place = stops[0].stoppingPlaceID
+        stopped_at[VID] = place
+
+        if facilities.kind_of.get(place) == "parkingArea":
+            print(f"veículo {VID} estacionado em {place}")
+
+        elif facilities.kind_of.get(place) == "chargingStation":
+            print(f"veículo {VID} na estação de carregamento {place}")
+            if VID in VTR and VTR[VID][1] == place:
+                # a parada atual é mantida: termina a recarga e segue para o destino original
+                attributes.change_target(VID, VTR[VID][0])
                 VTR[VID][2] = True
-    
-    return VTR
+
+def on_stop_ending(veh_ids, VTR, stopped_at):
+    for VID in veh_ids:
+        place = stopped_at.pop(VID, None)
+        if VID in VTR and VTR[VID][2] and VTR[VID][1] == place:
+            destino_original = VTR.pop(VID)[0]
+            print(f"Veículo {VID} carregado. Retornando para {destino_original}")
+
+def on_arrived(veh_ids, VTR, stopped_at):
+    for VID in veh_ids:
+        VTR.pop(VID, None)
+        stopped_at.pop(VID, None)
 
 def set_baterychargelevel(veh_id, batery):
     new_charge = random.uniform(0, float(batery))
     traci.vehicle.setParameter(veh_id, "device.battery.chargeLevel", str(new_charge))
-    return float(traci.vehicle.getParameter(veh_id, "device.battery.chargeLevel"))
-    
-def level_charge(actual_batery, maximum_batery):
-    return (float(actual_batery)*100)/float(maximum_batery)
+    return new_charge
 
-def recharge_substation(veh_id, route_id):
-    route_edges = traci.route.getEdges(route_id)
+def recharge_substation(veh_id):
+    route_edges = attributes.route(veh_id)
     destination = route_edges[-1]
 
-    charging_stations = traci.chargingstation.getIDList()
-    if not charging_stations:
+    road_id = traci.vehicle.getRoadID(veh_id)
+    lane_pos = traci.vehicle.getLanePosition(veh_id)
+    if road_id.startswith(":"): # na junção: planeja a partir da próxima aresta da rota
+        road_id = route_edges[traci.vehicle.getRouteIndex(veh_id) + 1]
+        lane_pos = 0.0
+
+    speed = traci.vehicle.getSpeed(veh_id)
+    brake_gap = speed * speed / (2 * traci.vehicle.getDecel(veh_id)) # distância mínima para conseguir parar
+    nearest = charging_planner.nearest(road_id, attributes.v_class(veh_id), lane_pos, brake_gap)
+    if nearest is None:
         return
     
-    station_id = random.choice(charging_stations)
-    lane_id = traci.chargingstation.getLaneID(station_id)
-    edge_id = lane_id.split("_")[0]
+    station_id, _ = nearest
+    edge_id = facilities.edge_of[station_id]
 
-    traci.vehicle.changeTarget(veh_id, edge_id)
-    traci.vehicle.setChargingStationStop(veh_id, station_id, duration=100,flags=1)
+    attributes.change_target(veh_id, edge_id)
+    attributes.set_charging_station_stop(veh_id, station_id, duration=100,flags=1)
 
     return [destination,station_id,False]
 
-def busStopIsOnRoute(route_edges, busStopID):
-    lane_id = traci.busstop.getLaneID(busStopID)
-    edge_id = lane_id.split("_")[0]
-    return edge_id in route_edges
-
-def get_color_by_battery(percentage):      
-    if percentage <= 14:
-        return (255, 0, 0, 255)      # Vermelho Crítico
-    elif percentage <= 28:
-        return (255, 69, 0, 255)     # Laranja Avermelhado
-    elif percentage <= 42:
-        return (255, 165, 0, 255)    # Laranja (Alerta)
-    elif percentage <= 56:
-        return (255, 255, 0, 255)    # Amarelo (Intermediário)
-    elif percentage <= 70:
-        return (173, 255, 47, 255)    # Verde Amarelado
-    elif percentage <= 85:
-        return (127, 255, 0, 255)    # Verde Claro
-    else:
-        return (0, 255, 0, 255)      # Verde (Cheio)
-
 def maybe_parking(ID_list):
     select = int(0.75*(len(ID_list)))
     ids_vehicles = random.sample(ID_list, k=select)
     
     for veh_id in ids_vehicles : 
-        route_edges = traci.vehicle.getRoute(veh_id)
-        parkingID = random.choice(traci.parkingarea.getIDList())
-        if parkingIsOnRoute(route_edges, parkingID ):
+        # só as arestas à frente da atual: a parada precisa estar a jusante do veículo
+        route_edges = attributes.route(veh_id)[traci.vehicle.getRouteIndex(veh_id) + 1:]
+        parkingID = facilities.select_on_route("parkingArea", route_edges, parking_weight())
+        if parkingID:
              print("este veiculo irá estacionar:",veh_id)
-             traci.vehicle.setParkingAreaStop(veh_id, parkingID, duration=120)
+             attributes.set_parking_area_stop(veh_id, parkingID, duration=120)
       
     return
 
-def maybe_charge(Veh_id_list, check_list):
+def maybe_charge(Veh_id_list, registry, battery):
+    candidates, capacities, charges = [], [], []
     for veh_id in Veh_id_list :
-        if veh_id in check_list :
+        if veh_id in registry :
             #Obtém a classe de emissão do veículo
-            emission_class = traci.vehicle.getEmissionClass(veh_id) 
+            emission_class = attributes.emission_class(veh_id) 
             if emission_class == "Energy/default":
 
                 capacity = float(traci.vehicle.getParameter(veh_id, "device.battery.capacity"))
                 current_charge = float(traci.vehicle.getParameter(veh_id, "device.battery.chargeLevel"))
 
-                NEWcurrent_charge = set_baterychargelevel(veh_id, current_charge)
-
+                candidates.append(veh_id)
+                capacities.append(capacity)
+                charges.append(set_baterychargelevel(veh_id, current_charge))
 
-                Level_charge = level_charge(NEWcurrent_charge,capacity)
-                cor_level = get_color_by_battery(Level_charge)
-                traci.vehicle.setColor(veh_id, cor_level)
-                if Level_charge < 20:
-                    print(f"Veículo de demanda aleatória {veh_id} irá recarregar e terminará sua rota após o recarregamento")
-                    recharge_substation(veh_id, traci.vehicle.getRouteID(veh_id))
+    rows = battery.update(candidates, capacities, charges)
+    for veh_id, cor_level in battery.recolor(rows):
+        visuals.set_color(veh_id, cor_level)
+    for veh_id in battery.low(20, rows):
+        print(f"Veículo de demanda aleatória {veh_id} irá recarregar e terminará sua rota após o recarregamento")
+        recharge_substation(veh_id)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,13 @@ import matplotlib.ticker as ticker
 from pathlib import Path
 import os
 import glob
+import json
+
+from telemetry import load_columns, query, vehicles, COLUMNS, CATEGORICAL, CSV_HEADER, NPZ_FOLDER, SQLITE_FILE
+
+"""Load config at config/config.json"""
+with open(r'config/config.json', 'r') as config_file:
+    config = json.load(config_file)
 
 # --- CONFIGURAÇÃO DE CAMINHOS ---
 base_dir = Path(__file__).resolve().parent
@@ -23,14 +30,38 @@ for arquivo in pasta_figures.glob("*.*"):
         print(f"Erro ao remover {arquivo.name}: {e}")
 
 # --- PROCESSAMENTO DOS DADOS ---
-arquivos_csv = glob.glob(str(pasta_results / "veh_*.csv"))
+def carregar_tabelas():
+    """(veh_id, DataFrame) por veículo, no formato gravado pela simulação (config["telemetry-format"])."""
+    formato = config.get("telemetry-format", "csv")
+
+    if formato == "sqlite":
+        # uma consulta por veículo, respondida pelo índice (veh_id, timestamp)
+        banco = pasta_results / SQLITE_FILE
+        return [(veh_id, pd.DataFrame({cabecalho: coluna for cabecalho, coluna in zip(CSV_HEADER, query(banco, veh_id).values())}))
+                for veh_id in vehicles(banco) if veh_id.startswith("veh_")]
+
+    if formato == "npz":
+        colunas = load_columns(pasta_results / NPZ_FOLDER, decode=False)
+        dados = {}
+        for nome, cabecalho in zip(COLUMNS, CSV_HEADER):
+            if nome in CATEGORICAL:
+                dados[cabecalho] = pd.Categorical.from_codes(colunas[nome], categories=colunas[f"{nome}_dict"])
+            else:
+                dados[cabecalho] = colunas[nome]
+        tabela = pd.DataFrame(dados)
+        return [(veh_id, df.reset_index(drop=True))
+                for veh_id, df in tabela.groupby("== ID ==", observed=True)
+                if str(veh_id).startswith("veh_")]
+
+    return [(Path(csv_path).stem, pd.read_csv(csv_path))
+            for csv_path in glob.glob(str(pasta_results / "veh_*.csv"))]
+
+tabelas = carregar_tabelas()
 
-if not arquivos_csv:
-    print("ERRO: Nenhum arquivo CSV encontrado em /results. Verifique se a simulação rodou.")
+if not tabelas:
+    print("ERRO: Nenhum arquivo de telemetria encontrado em /results. Verifique se a simulação rodou.")
 else:
-    for csv_path in arquivos_csv:
-        veh_id = Path(csv_path).stem
-        df = pd.read_csv(csv_path)
+    for veh_id, df in tabelas:
         
         # Ignorar arquivos vazios ou mal formados
         if df.empty or '== timestamp ==' not in df.columns:
@@ -0,0 +1,282 @@
+import hashlib
+import heapq
+import json
+import os
+import random
+from pathlib import Path
+
+import sumolib
+from sumolib.net.lane import SUMO_VEHICLE_CLASSES
+
+"""Load config at config/config.json"""
+with open(r'config/config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+CACHE_DIR = Path(config.get("cache-dir", "cache"))
+ALL_CLASSES = frozenset(SUMO_VEHICLE_CLASSES)
+
+_net = None
+_internal_net = None
+
+
+def get_net():
+    """sumolib view of the net file, read once per process."""
+    global _net
+    if _net is None:
+        _net = sumolib.net.readNet(config["net-file"])
+    return _net
+
+
+def get_internal_net():
+    """Same, with the internal (junction) lanes, which get_net() leaves out."""
+    global _internal_net
+    if _internal_net is None:
+        _internal_net = sumolib.net.readNet(config["net-file"], withInternal=True)
+    return _internal_net
+
+
+def file_hash(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def vehicle_classes(additional_file=None):
+    """vType id -> vClass for the types declared in the additional file."""
+    classes = {}
+    for vtype in sumolib.xml.parse(additional_file or config["additional-files"], "vType"):
+        classes[vtype.id] = vtype.vClass or "passenger"
+    return classes
+
+
+class RoutableEdgeIndex:
+    """Edges that each vehicle type may use, built once from the net file.
+
+    A lane that allows every vClass is unrestricted: it is usable by every type
+    except the ones in RESTRICTED_TYPES. A lane with an allow/disallow list is
+    usable by the types whose vClass it permits. The index is kept on disk under
+    CACHE_DIR, keyed by the hash of the net and additional files and RESTRICTED_TYPES,
+    so spawning a vehicle never queries the topology through TraCI.
+    """
+
+    def __init__(self, net_file, additional_file, restricted_types):
+        self.restricted_types = list(restricted_types)
+        self.key = hashlib.sha256(
+            (file_hash(net_file, additional_file) + json.dumps(sorted(self.restricted_types))).encode()
+        ).hexdigest()
+        self.path = CACHE_DIR / f"routable_edges_{self.key[:16]}.json"
+        self.additional_file = additional_file
+        self.index = {}
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as file:
+                cached = json.load(file)
+            if cached.get("key") == self.key:
+                self.index = cached["edges"]
+
+    def edges(self, veh_type):
+        if veh_type not in self.index:
+            self.index[veh_type] = self.build(veh_type)
+            self.save()
+        return self.index[veh_type]
+
+    def build(self, veh_type):
+        v_class = vehicle_classes(self.additional_file).get(veh_type, veh_type)
+        if v_class not in ALL_CLASSES:
+            v_class = "passenger"
+        restricted = veh_type in self.restricted_types
+
+        valid_edges = []
+        for edge in get_net().getEdges():                                       # internal edges are not loaded
+            for lane in edge.getLanes():
+                permissions = lane.getPermissions()
+                if permissions >= ALL_CLASSES:                                   # lane without restriction
+                    if not restricted:
+                        valid_edges.append(edge.getID())
+                        break
+                elif v_class in permissions:
+                    valid_edges.append(edge.getID())
+                    break
+        return valid_edges
+
+    def save(self):
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")  # parallel runs (ensemble.py) read it at import
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"key": self.key, "restricted_types": self.restricted_types, "edges": self.index}, file)
+        os.replace(temporary, self.path)
+
+
+routable_edges = RoutableEdgeIndex(config["net-file"], config["additional-files"],
+                                   config.get("RESTRICTED_TYPES", []))
+
+
+class FacilityIndex:
+    """Parking areas, charging stations and bus stops of the additional file.
+
+    Parsed once at startup into facility -> edge and edge -> facilities indexes,
+    so stop placement is a local lookup instead of getIDList()/getLaneID() calls.
+    IDs are kept sorted like TraCI's getIDList().
+    """
+
+    KINDS = ("parkingArea", "chargingStation", "busStop")
+
+    def __init__(self, additional_file):
+        self.edge_of = {}                                                       # facility -> edge
+        self.capacity_of = {}                                                   # parking area -> roadsideCapacity
+        self.start_pos_of = {}                                                  # facility -> startPos on its lane
+        self.kind_of = {}                                                       # facility -> parkingArea/chargingStation/busStop
+        self.by_kind = {kind: [] for kind in self.KINDS}
+        self.by_edge = {kind: {} for kind in self.KINDS}                        # kind -> edge -> [facilities]
+
+        for element in sumolib.xml.parse(additional_file, list(self.KINDS)):
+            kind = element.name
+            edge_id = element.lane.rsplit("_", 1)[0]
+            self.edge_of[element.id] = edge_id
+            self.kind_of[element.id] = kind
+            self.start_pos_of[element.id] = float(element.startPos or 0)
+            if kind == "parkingArea":
+                self.capacity_of[element.id] = int(element.roadsideCapacity or 0)
+            self.by_kind[kind].append(element.id)
+
+        for kind in self.KINDS:
+            self.by_kind[kind].sort()
+            for facility_id in self.by_kind[kind]:
+                self.by_edge[kind].setdefault(self.edge_of[facility_id], []).append(facility_id)
+
+    def ids(self, kind):
+        return self.by_kind[kind]
+
+    def on_route(self, kind, route_edges):
+        """Facilities of the given kind on the route, in route order."""
+        found = []
+        for edge_id in route_edges:
+            for facility_id in self.by_edge[kind].get(edge_id, ()):
+                if facility_id not in found:
+                    found.append(facility_id)
+        return found
+
+    def select_on_route(self, kind, route_edges, weight=None):
+        """Samples one facility that lies on the route, or None if there is none.
+
+        weight(facility_id) -> number makes the choice proportional to it (e.g.
+        free capacity); facilities with weight 0 are never picked.
+        """
+        candidates = self.on_route(kind, route_edges)
+        if not candidates:
+            return None
+        if weight is None:
+            return random.choice(candidates)
+
+        weights = [max(weight(facility_id), 0) for facility_id in candidates]
+        if not any(weights):
+            return None
+        return random.choices(candidates, weights=weights)[0]
+
+
+class ChargingPlanner:
+    """Nearest reachable charging station from any edge, per vClass.
+
+    One reverse Dijkstra per station over the sumolib graph gives the driving
+    distance from the start of every edge to that station; the stations are then
+    ranked per edge, so picking the best one when a vehicle crosses the SoC
+    threshold is a dictionary lookup.
+    """
+
+    def __init__(self, facilities):
+        self.facilities = facilities
+        self.rankings = {}                                                      # vClass -> edge -> [(distance, station)]
+
+    def prepare(self, v_classes):
+        """Builds the rankings of these vClasses up front, so no vehicle waits for them mid-run."""
+        for v_class in v_classes:
+            self.ranking(v_class)
+
+    def ranking(self, v_class):
+        if v_class not in self.rankings:
+            self.rankings[v_class] = self.build(v_class)
+        return self.rankings[v_class]
+
+    def build(self, v_class):
+        net = get_net()
+        ranking = {}
+
+        for station_id in self.facilities.ids("chargingStation"):
+            station_edge = self.facilities.edge_of[station_id]
+            distances = {station_edge: self.facilities.start_pos_of[station_id]}
+            heap = [(distances[station_edge], station_edge)]
+
+            while heap:
+                distance, edge_id = heapq.heappop(heap)
+                if distance > distances[edge_id]:
+                    continue
+                for incoming, connections in net.getEdge(edge_id).getIncoming().items():
+                    if not any(c.getFromLane().allows(v_class) and c.getToLane().allows(v_class)
+                               for c in connections):
+                        continue
+                    new_distance = distance + incoming.getLength()
+                    if new_distance < distances.get(incoming.getID(), float("inf")):
+                        distances[incoming.getID()] = new_distance
+                        heapq.heappush(heap, (new_distance, incoming.getID()))
+
+            for edge_id, distance in distances.items():
+                ranking.setdefault(edge_id, []).append((distance, station_id))
+
+        for stations in ranking.values():
+            stations.sort()
+        return ranking
+
+    def nearest(self, edge_id, v_class, lane_pos=0.0, brake_gap=0.0):
+        """(station, driving distance) of the closest station ahead, or None if none is reachable.
+        A station on edge_id closer than brake_gap is skipped: SUMO refuses a stop it cannot brake for."""
+        for distance, station_id in self.ranking(v_class).get(edge_id, ()):
+            if (self.facilities.edge_of[station_id] == edge_id
+                    and self.facilities.start_pos_of[station_id] < lane_pos + brake_gap):
+                continue                                                        # already passed it, or too close to stop
+            return station_id, distance - lane_pos
+        return None
+
+
+class RouteLengths:
+    """Prefix sums of route lengths, for the remaining distance without asking SUMO.
+
+    starts(edges) is the distance from the start of the route to the start of
+    each of its edges, counting the internal lanes crossed between consecutive
+    edges as SUMO's getDrivingDistance does. The remaining distance to the end
+    of the route is then total - starts[route_index] - lane_position. The
+    junction lengths are looked up once per pair of edges.
+    """
+
+    def __init__(self):
+        self.gaps = {}                                                          # (from_edge, to_edge) -> internal length
+
+    def gap(self, from_edge, to_edge):
+        pair = (from_edge, to_edge)
+        if pair not in self.gaps:
+            net = get_internal_net()
+            connections = net.getEdge(from_edge).getOutgoing().get(net.getEdge(to_edge), [])
+            via = connections[0].getViaLaneID() if connections else ""
+            length = 0.0
+            while via:                                                          # junctions may split the internal edge
+                lane = net.getLane(via)
+                length += lane.getLength()
+                outgoing = lane.getOutgoing()
+                via = outgoing[0].getViaLaneID() if outgoing else ""
+            self.gaps[pair] = length
+        return self.gaps[pair]
+
+    def starts(self, edges):
+        """(starts, total): start offset of every edge of the route and the route length."""
+        net = get_internal_net()
+        starts = [0.0]
+        for from_edge, to_edge in zip(edges, edges[1:]):
+            starts.append(starts[-1] + net.getEdge(from_edge).getLength() + self.gap(from_edge, to_edge))
+        return starts, starts[-1] + net.getEdge(edges[-1]).getLength()
+
+
+facilities = FacilityIndex(config["additional-files"])
+charging_planner = ChargingPlanner(facilities)
+route_lengths = RouteLengths()
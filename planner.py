@@ -0,0 +1,99 @@
+"""
+Pre-run planning of the controlled fleet (veh_0..N).
+
+Draws the whole schedule (departure time, vType and candidate origin/destination
+pairs of every vehicle) up front, computes the routes with sumolib on a process
+pool and writes them, with their parking/bus stops, to config["planned-routes"].
+SUMO loads that file at start, so the control loop only handles runtime decisions.
+
+Run from the repository root:
+    python planner.py
+"""
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import quoteattr
+
+from network import facilities, get_net, routable_edges, vehicle_classes
+
+"""Load config at config/config.json"""
+with open(r'config/config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+TRIES = 10                                                                      # same as addRandomVehicle
+
+
+def draw_schedule(vehicles_number, max_time):
+    """[(veh_id, depart, veh_type, [(from_edge, to_edge), ...])] for the whole fleet."""
+    schedule = []
+    for id_provisional in range(vehicles_number):
+        depart = random.randint(0, max_time)
+        veh_type = random.choice(config["vehicles"])
+        edges = routable_edges.edges(veh_type)
+
+        pairs = []
+        for travel in range(TRIES):
+            from_edge = random.choice(edges)
+            to_edge = random.choice(edges)
+            while to_edge == from_edge:
+                to_edge = random.choice(edges)
+            pairs.append((from_edge, to_edge))
+
+        schedule.append((f"veh_{id_provisional}", depart, veh_type, pairs))
+    return schedule
+
+
+def route_vehicle(job):
+    """Worker: first candidate pair that has a route, as a tuple of edge IDs."""
+    veh_id, v_class, pairs = job
+    net = get_net()
+    for from_edge, to_edge in pairs:
+        path, cost = net.getFastestPath(net.getEdge(from_edge), net.getEdge(to_edge), vClass=v_class)
+        if path:
+            return veh_id, tuple(edge.getID() for edge in path)
+    return veh_id, None
+
+
+def compute_routes(schedule, workers=None):
+    classes = vehicle_classes()
+    jobs = [(veh_id, classes.get(veh_type, "passenger"), pairs) for veh_id, depart, veh_type, pairs in schedule]
+    chunksize = max(1, len(jobs) // (4 * (workers or 8)))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=get_net) as pool:
+        return dict(pool.map(route_vehicle, jobs, chunksize=chunksize))
+
+
+def write_route_file(schedule, routes, path):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("<routes>\n")
+        for veh_id, depart, veh_type, pairs in sorted(schedule, key=lambda item: item[1]):
+            edges = routes.get(veh_id)
+            if not edges:
+                print(f"It was not possible to create a route for {veh_id}")
+                continue
+
+            file.write(f'    <vehicle id={quoteattr(veh_id)} type={quoteattr(veh_type)} depart="{depart:.2f}">\n')
+            file.write(f'        <route edges={quoteattr(" ".join(edges))}/>\n')
+            if veh_type in ["bus", "ElectricBus"]:
+                stop_id = facilities.select_on_route("busStop", edges)
+                if stop_id:
+                    file.write(f'        <stop busStop={quoteattr(stop_id)} duration="10"/>\n')
+            else:
+                parkingID = facilities.select_on_route("parkingArea", edges)
+                if parkingID:
+                    file.write(f'        <stop parkingArea={quoteattr(parkingID)} duration="10"/>\n')
+            file.write("    </vehicle>\n")
+        file.write("</routes>\n")
+
+
+def plan_fleet(workers=None):
+    """Plans veh_0..N and writes config["planned-routes"]; returns {veh_id: depart}."""
+    schedule = draw_schedule(config["vehicles_number"], config["Max_time"])
+    routes = compute_routes(schedule, workers)
+    write_route_file(schedule, routes, config["planned-routes"])
+    print(f"✓ {sum(1 for edges in routes.values() if edges)} rotas planejadas em {config['planned-routes']}")
+    return {veh_id: depart for veh_id, depart, veh_type, pairs in schedule if routes.get(veh_id)}
+
+
+if __name__ == "__main__":
+    plan_fleet()
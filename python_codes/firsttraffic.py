@@ -1,13 +1,14 @@
-import traci
-from sumolib import checkBinary
 import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend import traci, start
 
 RED = [255, 0, 0]
 EDGE_ID = 'closed'
 VEHICLES = ['1', '4', '8']
 
-sumoBinary = checkBinary('sumo-gui')
-
 # Load config at config\config.json
 with open(r'config/config.json', 'r') as config_file:
     config = json.load(config_file)
@@ -26,9 +27,8 @@ def main():
 """Starts the simulation."""
 
 def startSim():
-    traci.start(
+    start(
         [
-            sumoBinary,
             '--net-file', config["net-file"],
             '--route-files', config["route-files"],
             '--additional-files', config["additional-files"],
@@ -1,5 +1,3 @@
-import traci
-from sumolib import checkBinary
 import json
 import random
 from pathlib import Path
@@ -7,7 +5,9 @@ import csv
 import subprocess
 import sys
 
-sumoBinary = checkBinary('sumo-gui')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend import traci, start
+from network import routable_edges
 
 """Load config at config/config.json"""
 with open(r'config/config.json', 'r') as config_file:
@@ -82,9 +82,8 @@ def generate_random_trips():
 
 """Starts the simulation."""
 def startSim():
-    traci.start(
+    start(
         [
-            sumoBinary,
             '--net-file', config["net-file"],
             '--route-files', config["route-files"],
             '--additional-files', config["additional-files"],
@@ -213,26 +212,7 @@ def addRandomVehicle(veh_id):
 
 """Surch the edges for routes"""
 def possible_routes(veh_type):
-    valid_edges = []
-    for edge in traci.edge.getIDList():
-        if edge.startswith(":"): # ignore internals edges
-            continue
-        if traci.edge.getLaneNumber(edge) == 0: 
-            continue
-        
-        for i in range(traci.edge.getLaneNumber(edge)): 
-            lane_id = f"{edge}_{i}"
-            allowed = traci.lane.getAllowed(lane_id)
-            
-            if not allowed:
-                if veh_type not in config.get("RESTRICTED_TYPES", []):
-                    valid_edges.append(edge)
-                    break
-            else: 
-                if veh_type in allowed:
-                    valid_edges.append(edge)
-                    break
-    return valid_edges
+    return routable_edges.edges(veh_type)
 
 """Verify if there is parking on route"""
 def parkingIsOnRoute(route_edges, parkingID):
@@ -1,11 +1,12 @@
-import traci
-from sumolib import checkBinary
 import json
 import random
 from pathlib import Path
 import csv
+import sys
 
-sumoBinary = checkBinary('sumo-gui')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend import traci, start
+from network import routable_edges
 
 """Load config at config\config.json"""
 with open(r'config/config.json', 'r') as config_file:
@@ -41,9 +42,8 @@ def main():
 
 """Starts the simulation."""
 def startSim():
-    traci.start(
+    start(
         [
-            sumoBinary,
             '--net-file', config["net-file"],
             '--additional-files', config["additional-files"],
             '--gui-settings-file', config["gui-settings-file"],
@@ -105,32 +105,7 @@ def addRandomVehicle(veh_id,bus_stop,parking):
 
 """Surch the edges for routes"""
 def possible_routes(veh_type):
-    valid_edges = []
-
-    for edge in traci.edge.getIDList():
-
-        if edge.startswith(":"):                                                                # ignore internals edges  (cintersections)
-            continue
-       
-        if traci.edge.getLaneNumber(edge) == 0:                                                 # it needs to have at least one lane.
-            continue
-        
-        for i in range(traci.edge.getLaneNumber(edge)):                                         # checks if any lane accepts cars or vehicles.
-            lane_id = f"{edge}_{i}"
-            allowed = traci.lane.getAllowed(lane_id)
-            
-            """Verify if the vehicle is permitted"""
-            if not allowed:
-                if veh_type not in config["RESTRICTED_TYPES"]:
-                    valid_edges.append(edge)
-                    break
-
-            else:                                                                               # case 2: lane with restriction
-                if veh_type in allowed:
-                    valid_edges.append(edge)
-                    break
-
-    return valid_edges
+    return routable_edges.edges(veh_type)
 
 """Verify if bus stos is on route"""
 def busStopIsOnRoute(route_edges, busStopID):
@@ -1,5 +1,3 @@
-import traci
-from sumolib import checkBinary
 import json
 import random
 from pathlib import Path
@@ -7,7 +5,9 @@ import csv
 import subprocess
 import sys
 
-sumoBinary = checkBinary('sumo-gui')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend import traci, start
+from network import routable_edges
 
 """Load config at config\config.json"""
 with open(r'config/config.json', 'r') as config_file:
@@ -77,9 +77,8 @@ def generate_random_trips():
 
 """Starts the simulation."""
 def startSim():
-    traci.start(
+    start(
         [
-            sumoBinary,
             # (Input)
             '--net-file', config["net-file"],
             '--route-files', config["route-files"],
@@ -144,32 +143,7 @@ def addRandomVehicle(veh_id):
 
 """Surch the edges for routes"""
 def possible_routes(veh_type):
-    valid_edges = []
-
-    for edge in traci.edge.getIDList():
-
-        if edge.startswith(":"):                                                                # ignore internals edges  (cintersections)
-            continue
-       
-        if traci.edge.getLaneNumber(edge) == 0:                                                 # it needs to have at least one lane.
-            continue
-        
-        for i in range(traci.edge.getLaneNumber(edge)):                                         # checks if any lane accepts cars or vehicles.
-            lane_id = f"{edge}_{i}"
-            allowed = traci.lane.getAllowed(lane_id)
-            
-            """Verify if the vehicle is permitted"""
-            if not allowed:
-                if veh_type not in config["RESTRICTED_TYPES"]:
-                    valid_edges.append(edge)
-                    break
-
-            else:                                                                               # case 2: lane with restriction
-                if veh_type in allowed:
-                    valid_edges.append(edge)
-                    break
-
-    return valid_edges
+    return routable_edges.edges(veh_type)
 
 """Verify if there is parking on route"""
 def parkingIsOnRoute(route_edges, parkingID):
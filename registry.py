@@ -0,0 +1,64 @@
+"""Lifecycle states of a vehicle in the registry"""
+LOADED = 0
+RUNNING = 1
+
+
+class VehicleRecord:
+    """State of one vehicle between loading and arrival."""
+
+    __slots__ = ("veh_id", "state", "loaded_at", "departed_at")
+
+    def __init__(self, veh_id, loaded_at):
+        self.veh_id = veh_id
+        self.state = LOADED
+        self.loaded_at = loaded_at
+        self.departed_at = None
+
+
+class VehicleRegistry:
+    """Vehicles SUMO has loaded and not yet removed, updated only from the
+    loaded/departed/arrived deltas of each StepSnapshot.
+
+    Membership is a dict lookup, and a vehicle's record is dropped when it
+    arrives, so the registry holds at most the vehicles alive in the run.
+    """
+
+    def __init__(self):
+        self.records = {}                                                       # veh_id -> VehicleRecord
+        self.running = set()
+        self.total_loaded = 0
+        self.total_arrived = 0
+
+    def __contains__(self, veh_id):
+        return veh_id in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, veh_id, time):
+        """A vehicle created with traci.vehicle.add(): SUMO reports it as loaded
+        before the next step, so it never shows up in a snapshot's loaded delta."""
+        if veh_id not in self.records:
+            self.records[veh_id] = VehicleRecord(veh_id, time)
+            self.total_loaded += 1
+
+    def update(self, snapshot):
+        """Applies one snapshot; loaded first, so a vehicle that came and went between two steps leaves no record."""
+        for veh_id in snapshot.loaded:
+            if veh_id not in self.records:
+                self.records[veh_id] = VehicleRecord(veh_id, snapshot.time)
+                self.total_loaded += 1
+        for veh_id in snapshot.departed:
+            record = self.records.get(veh_id)
+            if record is not None:
+                record.state = RUNNING
+                record.departed_at = snapshot.time
+                self.running.add(veh_id)
+        for veh_id in snapshot.arrived:
+            if self.records.pop(veh_id, None) is not None:
+                self.total_arrived += 1
+            self.running.discard(veh_id)
+
+    def stats(self):
+        return {"alive": len(self.records), "running": len(self.running),
+                "loaded": self.total_loaded, "arrived": self.total_arrived}
@@ -0,0 +1,65 @@
+import json
+import os
+from collections import OrderedDict
+
+from backend import traci
+from network import CACHE_DIR, config, file_hash
+
+
+class RouteCache:
+    """Memoizes traci.simulation.findRoute by (from_edge, to_edge, vType).
+
+    Least recently used pairs are evicted past max_size. Failed lookups are kept
+    as an empty route, so unreachable pairs are skipped without asking SUMO again.
+    With persist=True the cache is saved under CACHE_DIR in a file named after the
+    hash of the net and additional files, so editing either one invalidates it.
+    """
+
+    def __init__(self, max_size=10000, persist=False):
+        self.max_size = max_size
+        self.persist = persist
+        self.key = file_hash(config["net-file"], config["additional-files"])
+        self.path = CACHE_DIR / f"routes_{self.key[:16]}.json"
+        self.routes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if persist and self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as file:
+                cached = json.load(file)
+            if cached.get("key") == self.key:
+                for from_edge, to_edge, veh_type, edges in cached["routes"][-max_size:]:
+                    self.routes[(from_edge, to_edge, veh_type)] = tuple(edges)
+
+    def find(self, from_edge, to_edge, veh_type):
+        """Edges of the route, or an empty tuple when there is none."""
+        pair = (from_edge, to_edge, veh_type)
+        if pair in self.routes:
+            self.hits += 1
+            self.routes.move_to_end(pair)
+            return self.routes[pair]
+
+        self.misses += 1
+        edges = tuple(traci.simulation.findRoute(from_edge, to_edge, vType=veh_type).edges)
+        self.routes[pair] = edges
+        if len(self.routes) > self.max_size:
+            self.routes.popitem(last=False)
+        return edges
+
+    def save(self):
+        if not self.persist:
+            return
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")  # parallel runs (ensemble.py) save too
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"key": self.key,
+                       "routes": [[*pair, list(edges)] for pair, edges in self.routes.items()]}, file)
+        os.replace(temporary, self.path)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.routes),
+                "hit_rate": self.hits / total if total else 0.0}
+
+
+route_cache = RouteCache(config.get("route-cache-size", 10000), config.get("route-cache-persist", False))
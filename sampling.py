@@ -0,0 +1,79 @@
+"""
+Telemetry sampling policies, applied in this order:
+
+    every-steps -> vehicles are only sampled on a grid of N steps (simulation()
+                   handles the grid; telemetry-interval, in seconds, overrides it)
+    deltas      -> a row is kept only when the speed, the SoC or the edge moved
+                   past its threshold since the vehicle's last kept row
+    max-rate    -> at most max_rate rows per second of simulated time per vehicle
+
+A vehicle's first row is always kept. stats() tells how many rows each policy
+dropped. None of them saves TraCI calls: collect() reads the subscription
+results SUMO already sent with the step. What does is step skipping, and
+stats() also counts the simulationStep() calls it avoided (0 without it).
+"""
+from scheduler import EPSILON
+
+
+class SamplingPolicy:
+    """Decides which telemetry rows are recorded and counts what was dropped.
+
+    speed_delta is in km/h and soc_delta in percentage points; None disables
+    them. When neither they nor on_edge_change are set, every sampled row
+    passes the delta policy.
+    """
+
+    def __init__(self, speed_delta=None, soc_delta=None, on_edge_change=False, max_rate=None):
+        self.speed_delta = speed_delta
+        self.soc_delta = soc_delta
+        self.on_edge_change = on_edge_change
+        self.min_interval = 1.0 / max_rate if max_rate else None
+        self.uses_deltas = speed_delta is not None or soc_delta is not None or on_edge_change
+
+        self.last = {}                                                          # veh_id -> (time, speed, soc, road_id) of the last kept row
+        self.steps = 0
+        self.passes = 0                                                         # simulationStep() calls
+        self.rows_kept = 0
+        self.dropped = {"every-steps": 0, "deltas": 0, "max-rate": 0}
+
+    def on_step(self, active, sampled, steps=1):
+        """Accounts for one pass of the loop that advanced `steps` simulation steps
+        with `active` tracked vehicles, sampled or not at its start. Vehicles on
+        internal edges, which register() never records, are counted here too."""
+        self.steps += steps
+        self.passes += 1
+        self.dropped["every-steps"] += active * (steps - 1 if sampled else steps)
+
+    def changed(self, last, speed, soc, road_id):
+        _, last_speed, last_soc, last_road = last
+        return ((self.speed_delta is not None and abs(speed - last_speed) >= self.speed_delta)
+                or (self.soc_delta is not None and abs(soc - last_soc) >= self.soc_delta)
+                or (self.on_edge_change and road_id != last_road))
+
+    def keep(self, veh_id, time, speed, soc, road_id):
+        last = self.last.get(veh_id)
+        if last is not None:
+            if self.uses_deltas and not self.changed(last, speed, soc, road_id):
+                self.dropped["deltas"] += 1
+                return False
+            if self.min_interval and time - last[0] < self.min_interval - EPSILON:
+                self.dropped["max-rate"] += 1
+                return False
+
+        self.last[veh_id] = (time, speed, soc, road_id)
+        self.rows_kept += 1
+        return True
+
+    def forget(self, arrived_ids):
+        for veh_id in arrived_ids:
+            self.last.pop(veh_id, None)
+
+    def stats(self):
+        rows_without_policies = self.rows_kept + sum(self.dropped.values())
+        return {
+            "rows_kept": self.rows_kept,
+            "rows_without_policies": rows_without_policies,
+            "row_reduction": 1 - self.rows_kept / rows_without_policies if rows_without_policies else 0.0,
+            "dropped": dict(self.dropped),
+            "step_calls_saved": self.steps - self.passes,
+        }
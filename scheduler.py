@@ -0,0 +1,40 @@
+import heapq
+import itertools
+
+"""Event kinds, in the order they run when due at the same time"""
+BATTERY_CHECK = 0
+PARKING_TRIGGER = 1
+DEPARTURE = 2
+PLANNED_DEPARTURE = 3                                                           # a vehicle of the precomputed plan is about to depart
+
+"""Tolerance for float step times (e.g. 0.1 + 0.2 != 0.3)"""
+EPSILON = 1e-6
+
+
+class EventScheduler:
+    """Priority queue of timed controller events.
+
+    Events are (time, kind, payload); due(now) pops every event whose time has
+    been reached, ordered by time and then by kind, so each step only costs the
+    number of events that are due and works with any step length.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()                                        # FIFO among equal (time, kind)
+
+    def schedule(self, time, kind, payload=None):
+        heapq.heappush(self.heap, (float(time), kind, next(self.counter), payload))
+
+    def due(self, now):
+        events = []
+        while self.heap and self.heap[0][0] <= now + EPSILON:
+            time, kind, _, payload = heapq.heappop(self.heap)
+            events.append((time, kind, payload))
+        return events
+
+    def next_time(self):
+        return self.heap[0][0] if self.heap else None
+
+    def __len__(self):
+        return len(self.heap)
@@ -0,0 +1,29 @@
+from backend import traci
+
+
+class StepSnapshot:
+    """Vehicle ID sets of the current simulation step.
+
+    Fetched once right after each simulationStep(); every phase of the control
+    loop reads from here instead of asking TraCI for getIDList() again. `ids`
+    keeps SUMO's order (for random.sample), the sets are for O(1) membership.
+    """
+
+    __slots__ = ("time", "ids", "active", "departed", "arrived", "loaded")
+
+    def __init__(self):
+        self.time = 0.0
+        self.ids = ()
+        self.active = set()
+        self.departed = set()
+        self.arrived = set()
+        self.loaded = set()
+
+    def refresh(self):
+        self.time = traci.simulation.getTime()
+        self.ids = traci.vehicle.getIDList()
+        self.active = set(self.ids)
+        self.departed = set(traci.simulation.getDepartedIDList())
+        self.arrived = set(traci.simulation.getArrivedIDList())
+        self.loaded = set(traci.simulation.getLoadedIDList())
+        return self
@@ -0,0 +1,173 @@
+"""
+Parameter sweep over config.json, with results cached by the resolved config.
+
+A sweep is either a grid, {"key": [value, ...], ...}, which runs every
+combination, or a list of override objects, [{"key": value, ...}, ...]. Each
+point is config.json with its overrides applied. It runs --seeds replications
+(ensemble.run_replication), and all the replications of all the points share
+one process pool. Every replication converts its own fleet with its seed and
+the point's ev-car-share/ev-bus-share, so the EV shares can be swept like any
+other key.
+
+Results are stored in sweeps/<hash>/seed_<n>/kpis.json. <hash> covers the
+resolved config and the contents of the input files it names: the net, the
+additional file, the activitygen demand and the fleet conversion script. A
+replication whose kpis.json exists is not simulated again, so re-running a
+sweep only runs the points (or seeds) that changed. Edits to the controller's
+code are not in the hash: use --force after them.
+
+The sweep is refused for keys not in config.json, for the keys read at import
+(net, additional file, RESTRICTED_TYPES... see ensemble.IMPORT_TIME_KEYS) and
+for stat: activitygen only runs once, for config.json's route-files when it is
+missing. To sweep the demand, generate the files beforehand and sweep
+route-files over them.
+
+Run from the repository root:
+    python sweep.py '{"vehicles_number": [3, 10], "ev-car-share": [0.3, 0.6]}' --seeds 4
+    python sweep.py points.json --name ev-shares
+"""
+import os
+os.environ.setdefault("RUN_MODE", "production")                                 # antes de importar backend: réplicas sem GUI
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+from pathlib import Path
+
+import fifthtraffic
+from ensemble import BASE_DIR, check_overrides, run_pool, summarize
+from network import file_hash
+
+"""Load config at config/config.json"""
+with open(r'config/config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+"""Keys of config.json naming input files whose contents go into a point's hash"""
+INPUT_KEYS = ("net-file", "additional-files", "route-files", "convert-fleet")
+
+"""Keys a sweep cannot override besides ensemble.IMPORT_TIME_KEYS: the demand is generated once, from config.json"""
+DEMAND_KEYS = ("stat",)
+
+SWEEP_DIR = BASE_DIR / config.get("sweep-dir", "sweeps")
+
+
+def expand(spec):
+    """List of override dicts from a grid or from a list of points."""
+    if isinstance(spec, list):
+        points = [dict(point) for point in spec]
+    else:
+        keys = list(spec)
+        points = [dict(zip(keys, values)) for values in itertools.product(*(spec[key] for key in keys))]
+    for point in points:
+        check_overrides(point)
+        fixed = sorted(key for key in point if key in DEMAND_KEYS)
+        if fixed:
+            raise ValueError(f"{', '.join(fixed)} cannot be swept: activitygen only runs for config.json's "
+                             f"route-files; sweep route-files over demand files generated beforehand")
+        if "route-files" in point and not Path(point["route-files"]).exists():
+            raise FileNotFoundError(f"route-files {point['route-files']} not found: a sweep does not run activitygen for it")
+    return points
+
+
+def point_hash(resolved):
+    digest = hashlib.sha256(json.dumps(resolved, sort_keys=True).encode("utf-8"))
+    digest.update(file_hash(*(resolved[key] for key in INPUT_KEYS)).encode("ascii"))
+    return digest.hexdigest()
+
+
+def write_json(path, data):
+    """Through a temporary file, so an interrupted sweep never leaves a half-written result."""
+    temporary = path.with_name(f"{path.name}.tmp")
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+    os.replace(temporary, path)
+
+
+def run_sweep(points, seeds, name="default", workers=None, base_port=None, force=False):
+    """Runs the replications missing from the cache; returns [(key, overrides, summary, cached)]."""
+    SWEEP_DIR.mkdir(parents=True, exist_ok=True)
+    if not Path(config["route-files"]).exists():                                # demanda do activitygen, comum a todos os pontos
+        fifthtraffic.generate_activity_trips()
+
+    planned = {}                                                                # key -> overrides, sem pontos repetidos
+    results = {}                                                                # key -> {seed: kpis}
+    jobs = []
+    for overrides in points:
+        resolved = {**config, **overrides}
+        key = point_hash(resolved)[:16]
+        if key in planned:
+            continue
+        planned[key] = overrides
+        results[key] = {}
+        folder = SWEEP_DIR / key
+        folder.mkdir(parents=True, exist_ok=True)
+        write_json(folder / "config.json", {"overrides": overrides, "resolved": resolved})
+
+        for seed in seeds:
+            kpis_path = folder / f"seed_{seed}" / "kpis.json"
+            if kpis_path.exists() and not force:
+                with open(kpis_path, "r", encoding="utf-8") as file:
+                    results[key][seed] = json.load(file)
+                continue
+            port = base_port + len(jobs) if base_port is not None else None
+            jobs.append((seed, str(folder / f"seed_{seed}"), f"{key[:8]}_{seed}", port, overrides, True))
+
+    cached = {key: len(runs) for key, runs in results.items()}
+    print(f"{len(planned)} pontos x {len(seeds)} seeds: {sum(cached.values())} no cache, {len(jobs)} a simular")
+    if jobs:
+        for done, (job, kpis, error) in enumerate(run_pool(jobs, workers), 1):
+            seed, folder = job[0], Path(job[1])
+            key = folder.parent.name
+            if error is not None:
+                print(f"✗ {key} seed {seed}: {error!r}")
+                continue
+            write_json(folder / "kpis.json", kpis)
+            results[key][seed] = kpis
+            print(f"✓ {key} seed {seed} em {kpis['wall_seconds']:.1f} s ({done}/{len(jobs)})")
+
+    rows = [(key, overrides, summarize(results[key]), cached[key]) for key, overrides in planned.items()]
+    write_summary(SWEEP_DIR / f"{name}.csv", rows)
+    return rows
+
+
+def write_summary(path, rows):
+    """One line per point and KPI, with the point's overrides as JSON."""
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["point", "overrides", "kpi", "n", "mean", "std", "ci_low", "ci_high"])
+        for key, overrides, summary, cached in rows:
+            for kpi, row in summary.items():
+                writer.writerow([key, json.dumps(overrides, sort_keys=True), kpi, row["n"], row["mean"],
+                                 row["std"], row["ci_low"], row["ci_high"]])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("spec", help="grid or list of points: JSON text or the path of a JSON file")
+    parser.add_argument("--seeds", type=int, default=4, help="replications per point")
+    parser.add_argument("--first-seed", type=int, default=1)
+    parser.add_argument("--name", default="default", help="summary file, sweeps/<name>.csv")
+    parser.add_argument("--workers", type=int, default=None, help="default: every core")
+    parser.add_argument("--port", type=int, default=None, help="first TraCI port; default: any free port")
+    parser.add_argument("--force", action="store_true", help="simulate every point again")
+    parser.add_argument("--kpis", default="vehicleTripStatistics.duration,telemetry.final_soc",
+                        help="KPIs shown in the table (all of them go to the CSV)")
+    args = parser.parse_args()
+
+    spec = Path(args.spec).read_text(encoding="utf-8") if Path(args.spec).is_file() else args.spec
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    rows = run_sweep(expand(json.loads(spec)), seeds, args.name, args.workers, args.port, args.force)
+
+    kpis = args.kpis.split(",")
+    print(f"resumo em {SWEEP_DIR.name}/{args.name}.csv")
+    print(f"{'point':<18}{'n':>4}{'cache':>7}" + "".join(f"{kpi:>32}" for kpi in kpis) + "  overrides")
+    for key, overrides, summary, cached in rows:
+        n = max((row["n"] for row in summary.values()), default=0)
+        means = "".join(f"{summary[kpi]['mean']:>32.3f}" if kpi in summary else f"{'-':>32}" for kpi in kpis)
+        print(f"{key:<18}{n:>4}{cached:>7}{means}  {json.dumps(overrides, sort_keys=True)}")
+
+
+if __name__ == "__main__":
+    main()
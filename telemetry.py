@@ -0,0 +1,437 @@
+"""
+Telemetry sinks for the rows produced by register().
+
+    "csv" -> results/<veh>.csv, one text file per vehicle (the original format)
+    "npz"    -> results/telemetry/part_<n>.npz, one compressed row group per flush
+                with typed columns; text columns are dictionary encoded
+    "sqlite" -> results/telemetry.db, one table in WAL mode indexed by
+                (veh_id, timestamp) and by timestamp
+All of them buffer the rows and write them in batches; ThreadedSink moves that
+work to a writer thread fed by a bounded queue.
+`python telemetry.py export npz|sqlite` turns a run back into the per-vehicle CSVs.
+"""
+import atexit
+import csv
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict, OrderedDict
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+
+"""Columns of a telemetry row, in the order of the results/<veh>.csv header"""
+COLUMNS = ("veh_id", "speed_kmh", "road_id", "distance", "destination",
+           "remaining", "type", "soc", "timestamp")
+
+CSV_HEADER = [
+    "== ID ==",
+    "== Velocity (Kh/h) ==",
+    "== Atual route ==",
+    "== Distance traveled(m) ==",
+    "== Destination ==",
+    "== Distance from destination(m) ==",
+    "== TYPE ==",
+    "== Batery level(%) ==",
+    "== timestamp =="
+]
+
+"""dtype of each numeric column; the others are text, stored as int32 codes into a dictionary.
+float64 keeps the values SUMO returned, so the CSV export matches a csv run digit for digit"""
+DTYPES = {
+    "speed_kmh": np.float64,
+    "distance": np.float64,
+    "remaining": np.float64,
+    "soc": np.float64,
+    "timestamp": np.float64,
+}
+CATEGORICAL = [name for name in COLUMNS if name not in DTYPES]
+
+NPZ_FOLDER = "telemetry"
+SQLITE_FILE = "telemetry.db"
+
+
+def format_csv_row(row):
+    """Row as written to the CSV: one decimal place for the measured values."""
+    veh_id, speed_kmh, road_id, distance, destination, remaining, veh_type, soc, timestamp = row
+    return [veh_id, "{:.1f}".format(speed_kmh), road_id, "{:.1f}".format(distance), destination,
+            "{:.1f}".format(remaining), veh_type, "{:.1f}".format(soc), timestamp]
+
+
+class BufferedSink:
+    """Buffers telemetry rows in memory and hands them to write_batch() in batches.
+
+    Rows are flushed once batch_rows are pending or flush_seconds have passed
+    since the last flush. close() flushes what is left and is also registered
+    with atexit, so a run that dies with an exception still keeps its rows.
+    """
+
+    def __init__(self, batch_rows=5000, flush_seconds=5.0):
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.rows = []
+        self.last_flush = time.monotonic()
+        self.rows_written = 0
+        self.closed = False
+        atexit.register(self.close)
+
+    def write(self, veh_id, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_rows or time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.write_batch(self.rows)
+            self.rows_written += len(self.rows)
+            self.rows = []
+        self.last_flush = time.monotonic()
+
+    def write_batch(self, rows):
+        raise NotImplementedError
+
+    def stats(self):
+        return {"rows_written": self.rows_written}
+
+    def release(self):
+        """Closes whatever the sink keeps open; called once, after the last flush."""
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        try:
+            self.flush()
+        finally:
+            self.release()                                                      # files/connection closed even if the last flush failed
+
+
+class CsvSink(BufferedSink):
+    """Appends the rows to results/<veh>.csv.
+
+    Files stay open between flushes; past max_open_files the least recently
+    written one is closed.
+    """
+
+    def __init__(self, results_dir, batch_rows=5000, flush_seconds=5.0, max_open_files=256):
+        super().__init__(batch_rows, flush_seconds)
+        self.results_dir = Path(results_dir)
+        self.max_open_files = max_open_files
+        self.files = OrderedDict()                                              # veh_id -> (file, csv.writer)
+
+    def writer(self, veh_id):
+        if veh_id in self.files:
+            self.files.move_to_end(veh_id)
+            return self.files[veh_id][1]
+
+        path = self.results_dir / f"{veh_id}.csv"
+        new_file = not path.exists()                                            # fleet vehicles have no file from setup
+        file = open(path, mode="a", newline="", encoding="utf-8")
+        self.files[veh_id] = (file, csv.writer(file))
+        if new_file:
+            self.files[veh_id][1].writerow(CSV_HEADER)
+        if len(self.files) > self.max_open_files:
+            self.files.popitem(last=False)[1][0].close()
+        return self.files[veh_id][1]
+
+    def write_batch(self, rows):
+        by_vehicle = defaultdict(list)
+        for row in rows:
+            by_vehicle[row[0]].append(format_csv_row(row))
+        for veh_id, vehicle_rows in by_vehicle.items():
+            self.writer(veh_id).writerows(vehicle_rows)
+        for file, _ in self.files.values():
+            file.flush()
+
+    def release(self):
+        for file, _ in self.files.values():
+            file.close()
+        self.files.clear()
+
+
+class NpzSink(BufferedSink):
+    """Writes each batch as a compressed row group, results/telemetry/part_<n>.npz.
+
+    Text columns are stored as int32 codes. The dictionaries are append-only
+    and every part carries the entries it added (<column>_dict), so the parts
+    written before a crash can still be read in order. A part is written to a
+    temporary file and renamed, so there is never a half-written one.
+    """
+
+    def __init__(self, folder, batch_rows=5000, flush_seconds=5.0):
+        super().__init__(batch_rows, flush_seconds)
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        for old_part in self.folder.glob("part_*.npz"):
+            old_part.unlink()
+        self.codes = {name: {} for name in CATEGORICAL}
+        self.parts = 0
+
+    def write_batch(self, rows):
+        arrays = {}
+        for name, values in zip(COLUMNS, zip(*rows)):
+            if name in DTYPES:
+                arrays[name] = np.asarray(values, dtype=DTYPES[name])
+                continue
+            codes = self.codes[name]
+            known = len(codes)
+            arrays[name] = np.fromiter((codes.setdefault(value, len(codes)) for value in values),
+                                       dtype=np.int32, count=len(values))
+            arrays[f"{name}_dict"] = np.array(list(codes)[known:] if len(codes) > known else [], dtype=str)
+
+        path = self.folder / f"part_{self.parts:05d}.npz"
+        temporary = path.with_suffix(".tmp")
+        with open(temporary, "wb") as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(temporary, path)
+        self.parts += 1
+
+
+class SqliteSink(BufferedSink):
+    """Inserts the rows into the telemetry table of results/telemetry.db.
+
+    Each batch is one transaction with executemany(). WAL mode lets analysis
+    tools read the database while the run is still writing to it.
+    """
+
+    def __init__(self, path, batch_rows=5000, flush_seconds=5.0):
+        super().__init__(batch_rows, flush_seconds)
+        self.path = Path(path)
+        for old_file in (self.path, Path(f"{self.path}-wal"), Path(f"{self.path}-shm")):
+            if old_file.exists():
+                old_file.unlink()
+
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)  # used by one thread at a time (ThreadedSink)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{name} {'REAL' if name in DTYPES else 'TEXT'}" for name in COLUMNS)
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE telemetry ({columns})")
+            self.connection.execute("CREATE INDEX telemetry_vehicle_time ON telemetry (veh_id, timestamp)")
+            self.connection.execute("CREATE INDEX telemetry_time ON telemetry (timestamp)")
+        self.insert = f"INSERT INTO telemetry VALUES ({', '.join('?' for _ in COLUMNS)})"
+
+    def write_batch(self, rows):
+        with self.connection:
+            self.connection.executemany(self.insert, rows)
+
+    def release(self):
+        self.connection.close()
+
+
+class ThreadedSink:
+    """Runs a sink on a writer thread; the control loop only enqueues the raw rows.
+
+    Rows go through the queue in chunks of chunk_rows (or whatever arrived in
+    the last flush_seconds), which keeps the locking cost per row small. The queue holds at most queue_size rows: when the
+    writer falls behind, write() blocks (backpressure) and the time spent
+    blocked is counted in stats(). While the queue is idle the thread flushes the sink every
+    flush_seconds. close() drains the queue, joins the thread and closes the
+    sink; it is registered with atexit too. An error on the writer thread is
+    raised again by the next write() or by close().
+    """
+
+    STOP = object()
+
+    def __init__(self, sink, queue_size=10000, chunk_rows=256):
+        self.sink = sink
+        self.chunk_rows = chunk_rows
+        self.chunk = []
+        self.last_enqueue = time.monotonic()
+        self.queue = queue.Queue(maxsize=max(1, queue_size // chunk_rows))
+        self.enqueued = 0
+        self.max_depth = 0
+        self.blocked = 0
+        self.blocked_seconds = 0.0
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="telemetry-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self.sink.flush_seconds)
+            except queue.Empty:
+                item = None                                                     # idle: timed flush
+            if item is self.STOP:
+                return
+            try:
+                if item is None:
+                    self.sink.flush()
+                else:
+                    for veh_id, row in item:
+                        self.sink.write(veh_id, row)
+            except Exception as error:                                          # keeps draining so write() never blocks forever
+                self.error = self.error or error
+
+    def write(self, veh_id, row):
+        self.chunk.append((veh_id, row))
+        if len(self.chunk) >= self.chunk_rows or time.monotonic() - self.last_enqueue >= self.sink.flush_seconds:
+            self.enqueue()
+
+    def enqueue(self):
+        if self.error:
+            raise self.error
+        chunk, self.chunk = self.chunk, []
+        self.last_enqueue = time.monotonic()
+        try:
+            self.queue.put_nowait(chunk)
+        except queue.Full:
+            begin = time.perf_counter()
+            self.put(chunk)
+            self.blocked += 1
+            self.blocked_seconds += time.perf_counter() - begin
+        self.enqueued += len(chunk)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def put(self, item):
+        """Blocking put that gives up if the writer thread is gone, instead of waiting forever."""
+        while True:
+            try:
+                self.queue.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                if not self.thread.is_alive():
+                    raise self.error or RuntimeError("telemetry writer thread stopped")
+
+    def flush(self):
+        """Hands the rows still held by the control loop to the writer thread."""
+        if self.chunk:
+            self.enqueue()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        try:
+            self.flush()
+        finally:
+            if self.thread.is_alive():
+                self.put(self.STOP)
+                self.thread.join()
+            self.sink.close()
+        if self.error:
+            raise self.error
+
+    def stats(self):
+        return {**self.sink.stats(), "enqueued": self.enqueued, "queue_rows": self.queue.maxsize * self.chunk_rows,
+                "max_queue_rows": self.max_depth * self.chunk_rows, "blocked_writes": self.blocked,
+                "blocked_seconds": round(self.blocked_seconds, 3)}
+
+
+def open_sink(fmt, results_dir, batch_rows=5000, flush_seconds=5.0):
+    """Sink for config["telemetry-format"] ("csv", "npz" or "sqlite")."""
+    if fmt == "csv":
+        return CsvSink(results_dir, batch_rows, flush_seconds)
+    if fmt == "npz":
+        return NpzSink(Path(results_dir) / NPZ_FOLDER, batch_rows, flush_seconds)
+    if fmt == "sqlite":
+        return SqliteSink(Path(results_dir) / SQLITE_FILE, batch_rows, flush_seconds)
+    raise ValueError(f"unknown telemetry format {fmt!r} (expected 'csv', 'npz' or 'sqlite')")
+
+
+def load_columns(folder, decode=True):
+    """All parts of an npz run as {column: array}, in the order they were written.
+
+    Text columns come back as string arrays, or with decode=False as the int32
+    codes plus the dictionary in <column>_dict.
+    """
+    dictionaries = {name: [] for name in CATEGORICAL}
+    parts = defaultdict(list)
+    for path in sorted(Path(folder).glob("part_*.npz")):
+        with np.load(path) as part:
+            for name in COLUMNS:
+                parts[name].append(part[name])
+            for name in CATEGORICAL:
+                dictionaries[name].extend(part[f"{name}_dict"].tolist())
+
+    columns = {}
+    for name in COLUMNS:
+        dtype = DTYPES.get(name, np.int32)
+        columns[name] = np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=dtype)
+    for name in CATEGORICAL:
+        dictionary = np.array(dictionaries[name], dtype=str)
+        if decode:
+            columns[name] = dictionary[columns[name]] if len(dictionary) else columns[name].astype(str)
+        else:
+            columns[f"{name}_dict"] = dictionary
+    return columns
+
+
+def query(path, veh_id=None, start=None, end=None):
+    """Rows of a sqlite run as {column: array}, optionally for one vehicle and/or
+    the time window start <= timestamp <= end; answered from the indexes.
+
+    Filtered rows come ordered by timestamp, the whole table in insertion order.
+    """
+    conditions, params = [], []
+    if veh_id is not None:
+        conditions.append("veh_id = ?")
+        params.append(veh_id)
+    if start is not None:
+        conditions.append("timestamp >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("timestamp <= ?")
+        params.append(end)
+    where = f" WHERE {' AND '.join(conditions)} ORDER BY timestamp, rowid" if conditions else " ORDER BY rowid"
+
+    with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as connection:
+        rows = connection.execute(f"SELECT {', '.join(COLUMNS)} FROM telemetry{where}", params).fetchall()
+    values = list(zip(*rows)) or [()] * len(COLUMNS)
+    return {name: np.array(column, dtype=DTYPES.get(name, str)) for name, column in zip(COLUMNS, values)}
+
+
+def vehicles(path):
+    """IDs of the vehicles in a sqlite run."""
+    with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as connection:
+        return [veh_id for (veh_id,) in connection.execute("SELECT DISTINCT veh_id FROM telemetry ORDER BY veh_id")]
+
+
+def load_run(results_dir, fmt="csv"):
+    """All rows of a run as {column: array}, whatever format it was written in."""
+    results_dir = Path(results_dir)
+    if fmt == "sqlite":
+        return query(results_dir / SQLITE_FILE)
+    if fmt == "npz":
+        return load_columns(results_dir / NPZ_FOLDER)
+
+    rows = []
+    for path in sorted(results_dir.glob("*.csv")):
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            next(reader, None)                                                  # header
+            rows.extend(reader)
+    values = list(zip(*rows)) or [()] * len(COLUMNS)
+    return {name: np.array(column, dtype=DTYPES.get(name, str)) for name, column in zip(COLUMNS, values)}
+
+
+def export_csv(results_dir, fmt="npz"):
+    """Writes results_dir/<veh>.csv, with the original header, from an npz or sqlite run."""
+    results_dir = Path(results_dir)
+    columns = query(results_dir / SQLITE_FILE) if fmt == "sqlite" else load_columns(results_dir / NPZ_FOLDER)
+    by_vehicle = defaultdict(list)
+    for row in zip(*(columns[name].tolist() for name in COLUMNS)):
+        by_vehicle[row[0]].append(format_csv_row(row))
+
+    for veh_id, rows in by_vehicle.items():
+        with open(results_dir / f"{veh_id}.csv", mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(rows)
+    return len(by_vehicle)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["export"] or sys.argv[2:3] not in (["npz"], ["sqlite"]):
+        sys.exit("usage: python telemetry.py export npz|sqlite [results_dir]")
+    results = Path(sys.argv[3]) if len(sys.argv) > 3 else Path(__file__).resolve().parent / "results"
+    print(f"✓ {export_csv(results, sys.argv[2])} arquivos CSV exportados em {results}")